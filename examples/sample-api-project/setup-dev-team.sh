@@ -95,6 +95,13 @@ git init -b main
 echo "📂 ディレクトリ構造を作成中..."
 mkdir -p {shared/{specs,data},output/{frontend,backend,tests,infrastructure},.claude}
 
+# .gitignore作成（CLAUDE.mdの生成結果とスキップ判定用マニフェスト）
+cat > .gitignore << 'EOF'
+.claude-md/
+.claude-md-manifest.json
+sync/.monitor-cache/
+EOF
+
 # 設定ファイル作成
 echo "⚙️ プロジェクト設定を作成中..."
 cat > .claude/project-config.json << EOF
@@ -194,6 +201,16 @@ declare -A agent_names=(
     ["devops-engineer"]="DevOps Engineer"
 )
 
+# CLAUDE.mdを全エージェント分まとめて生成（Python起動・設定読み込みは1回）
+# 生成先は残しておき、入力が変わっていないエージェントは再実行時に描画しない
+CLAUDE_MD_DIR="$(pwd)/.claude-md"
+python3 ../../development-engineering-multiagent/scripts/generate-dev-claude-config.py \
+    --team dev \
+    --project-name "$PROJECT_NAME" \
+    --tech-stack "$FRONTEND_STACK,$BACKEND_STACK,$DATABASE" \
+    --output-dir "$CLAUDE_MD_DIR" \
+    --worktree-pattern "{agent}"
+
 for worktree in "${!agents[@]}"; do
     agent=${agents[$worktree]}
     agent_name=${agent_names[$agent]}
@@ -207,12 +224,8 @@ for worktree in "${!agents[@]}"; do
     cd "../${worktree}"
     mkdir -p {work,sync}
     
-    # CLAUDE.md生成
-    python3 ../../development-engineering-multiagent/scripts/generate-dev-claude-config.py \
-        --agent "$agent" \
-        --project-name "$PROJECT_NAME" \
-        --tech-stack "$FRONTEND_STACK,$BACKEND_STACK,$DATABASE" \
-        --output-dir .
+    # CLAUDE.md配置（マニフェストも置き、worktreeへの再生成もスキップできるようにする）
+    cp "$CLAUDE_MD_DIR/$agent/CLAUDE.md" "$CLAUDE_MD_DIR/$agent/.claude-md-manifest.json" .
     
     # 共有ディレクトリへのシンボリックリンク
     ln -s "../${PROJECT_NAME}/shared" shared
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+TDD進捗モニターのベンチマーク
+合成したworktree・テストツリー・レポートに対して
+generate_dashboard()・watchの1ティック・メモリ使用量を計測し、パーセンタイルをJSONで出力する
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import importlib.util
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_AGENTS = [
+    "test-lead",
+    "backend-developer",
+    "frontend-developer",
+    "review-engineer",
+    "integration-engineer"
+]
+
+
+def load_monitor_module():
+    """同じディレクトリの monitor-tdd-progress.py を読み込む"""
+    path = Path(__file__).resolve().parent / "monitor-tdd-progress.py"
+    spec = importlib.util.spec_from_file_location("monitor_tdd_progress", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentiles(samples):
+    """ミリ秒単位の要約統計（線形補間のパーセンタイル）"""
+    ordered = sorted(samples)
+
+    def at(q):
+        position = (len(ordered) - 1) * q
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "p50_ms": round(at(0.5) * 1000, 3),
+        "p90_ms": round(at(0.9) * 1000, 3),
+        "p99_ms": round(at(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+class SyntheticProject:
+    """ベンチマーク用の合成プロジェクト（ネットワーク不要、gitはローカルのみ使用）"""
+
+    def __init__(self, root, agents, commit_depth=200, test_files=5000, files_per_dir=100,
+                 report_cases=5000, coverage_files=2000, seed=0):
+        self.root = Path(root)
+        self.project_path = self.root / "project"
+        self.agents = agents
+        self.commit_depth = commit_depth
+        self.test_files = test_files
+        self.files_per_dir = files_per_dir
+        self.report_cases = report_cases
+        self.coverage_files = coverage_files
+        self.random = random.Random(seed)
+        self._mutations = 0
+
+    def _git(self, *args, cwd=None, stdin=None):
+        env = dict(
+            os.environ,
+            GIT_AUTHOR_NAME="Bench", GIT_AUTHOR_EMAIL="bench@example.com",
+            GIT_COMMITTER_NAME="Bench", GIT_COMMITTER_EMAIL="bench@example.com"
+        )
+        subprocess.run(
+            ["git", *args],
+            cwd=cwd or self.project_path,
+            input=stdin,
+            env=env,
+            check=True,
+            capture_output=True
+        )
+
+    def build(self):
+        """リポジトリ・worktree・テストツリー・レポートを生成"""
+        self.project_path.mkdir(parents=True)
+        self._git("init", "-q", "-b", "main")
+        self._git("fast-import", "--quiet", stdin=self._history_stream())
+        self._git("checkout", "-q", "main")
+        for agent in self.agents:
+            worktree = self.root / f"worktree-{agent}"
+            self._git("worktree", "add", "-q", str(worktree), f"agent/{agent}")
+            (worktree / "sync").mkdir(exist_ok=True)
+            (worktree / "sync" / "status.md").write_text(f"# {agent}\n")
+            # 未コミットの変更を少し残す
+            with open(worktree / f"src-{agent}.txt", "a") as f:
+                f.write("dirty\n")
+        self._build_test_tree()
+        self._build_reports()
+
+    def _history_stream(self):
+        """git fast-import 用のストリーム（エージェントごとのブランチにcommit_depth件のコミット）"""
+        now = int(time.time())
+        start = now - self.commit_depth * len(self.agents) * 60
+        chunks = []
+
+        def data(text):
+            payload = text.encode()
+            chunks.append(b"data %d\n" % len(payload) + payload + b"\n")
+
+        chunks.append(b"commit refs/heads/main\nmark :1\n")
+        chunks.append(b"committer Bench <bench@example.com> %d +0000\n" % start)
+        data("initial commit")
+        chunks.append(b"M 100644 inline README.md\n")
+        data("# synthetic project\n")
+
+        mark = 1
+        for index, agent in enumerate(self.agents):
+            parent = 1
+            for depth in range(self.commit_depth):
+                mark += 1
+                timestamp = start + (depth * len(self.agents) + index) * 60
+                chunks.append(f"commit refs/heads/agent/{agent}\nmark :{mark}\n".encode())
+                chunks.append(b"committer Bench <bench@example.com> %d +0000\n" % timestamp)
+                data(f"{agent}: change {depth + 1}")
+                chunks.append(f"from :{parent}\n".encode())
+                chunks.append(f"M 100644 inline src-{agent}.txt\n".encode())
+                data(f"{depth}\n")
+                parent = mark
+        return b"".join(chunks)
+
+    def _build_test_tree(self):
+        """output/tests 配下にテストファイルを生成"""
+        tests_root = self.project_path / "output" / "tests"
+        for index in range(self.test_files):
+            directory = tests_root / f"module_{index // self.files_per_dir:04d}"
+            if index % self.files_per_dir == 0:
+                directory.mkdir(parents=True, exist_ok=True)
+            suffix = ".test.js" if index % 2 else "_test.py"
+            (directory / f"case_{index:06d}{suffix}").write_text("// synthetic\n")
+
+    def _build_reports(self):
+        """JUnit XML と lcov のレポートを生成"""
+        reports = self.project_path / "output" / "tests" / "reports"
+        reports.mkdir(parents=True, exist_ok=True)
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>', "<testsuites>"]
+        suite_size = 100
+        for start in range(0, self.report_cases, suite_size):
+            cases = range(start, min(start + suite_size, self.report_cases))
+            lines.append(f'<testsuite name="suite_{start // suite_size}" tests="{len(cases)}">')
+            for case in cases:
+                lines.append(f'<testcase classname="suite_{start // suite_size}" name="case_{case}" time="0.01">')
+                if self.random.random() < 0.05:
+                    lines.append('<failure message="assertion failed">expected 1 got 2</failure>')
+                lines.append("</testcase>")
+            lines.append("</testsuite>")
+        lines.append("</testsuites>")
+        (reports / "junit.xml").write_text("\n".join(lines) + "\n")
+
+        coverage_dir = self.project_path / "coverage"
+        coverage_dir.mkdir(exist_ok=True)
+        with open(coverage_dir / "lcov.info", "w") as f:
+            for index in range(self.coverage_files):
+                found = self.random.randint(20, 400)
+                hit = self.random.randint(0, found)
+                f.write(f"TN:\nSF:src/module_{index // 50:03d}/file_{index:05d}.js\n")
+                for line in range(1, found + 1):
+                    f.write(f"DA:{line},{1 if line <= hit else 0}\n")
+                f.write(f"LF:{found}\nLH:{hit}\nend_of_record\n")
+
+    def mutate(self):
+        """watchティック用の変更を1つ加える（status.md更新とイベント追記・テスト追加・コミットを順に）"""
+        self._mutations += 1
+        kind = ("status", "test", "commit")[self._mutations % 3]
+        agent = self.agents[self._mutations % len(self.agents)]
+        worktree = self.root / f"worktree-{agent}"
+        if kind == "status":
+            with open(worktree / "sync" / "status.md", "a") as f:
+                f.write(f"- tick {self._mutations}\n")
+            with open(worktree / "sync" / "events.jsonl", "a") as f:
+                f.write(json.dumps({"ts": time.time(), "agent": agent, "event": "implement-started"}) + "\n")
+        elif kind == "test":
+            directory = self.project_path / "output" / "tests" / "module_0000"
+            (directory / f"tick_{self._mutations:06d}.test.js").write_text("// tick\n")
+        else:
+            with open(worktree / f"src-{agent}.txt", "a") as f:
+                f.write(f"tick {self._mutations}\n")
+            self._git("commit", "-q", "-am", f"{agent}: tick {self._mutations}", cwd=worktree)
+        return kind
+
+
+def create_monitor(module, project, args):
+    """ベンチマーク対象のモニターを生成（agent/<名前> ブランチのworktreeは自動で監視対象になる）"""
+    return module.TDDProgressMonitor(
+        project.project_path,
+        parallelism=args.parallel,
+        history=not args.no_history
+    )
+
+
+def bench_dashboard(module, project, args):
+    """generate_dashboard() の所要時間（初回のキャッシュなし状態と、以降の定常状態）"""
+    shutil.rmtree(project.project_path / "sync" / ".monitor-cache", ignore_errors=True)
+    monitor = create_monitor(module, project, args)
+    try:
+        started = time.perf_counter()
+        monitor.generate_dashboard()
+        cold = time.perf_counter() - started
+
+        samples = []
+        render_samples = []
+        subprocess_calls = 0
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            snapshot = monitor.collect_snapshot()
+            collected = time.perf_counter()
+            monitor.generate_dashboard(snapshot)
+            finished = time.perf_counter()
+            samples.append(finished - started)
+            render_samples.append(finished - collected)
+            subprocess_calls = snapshot.subprocess_count
+    finally:
+        monitor.close()
+    return {
+        "cold_ms": round(cold * 1000, 3),
+        "warm": percentiles(samples),
+        "render_only": percentiles(render_samples),
+        "subprocess_calls_per_refresh": subprocess_calls
+    }
+
+
+def bench_watch(module, project, args):
+    """watchの1ティック（変更発生→検知→差分再収集→公開）のレイテンシ"""
+    monitor = create_monitor(module, project, args)
+    watcher = module.create_file_watcher(args.watch_backend, args.poll_interval)
+    latency = {"all": [], "status": [], "test": [], "commit": []}
+    processing = []
+    missed = 0
+    try:
+        monitor.register_watches(watcher)
+        snapshot = monitor.collect_snapshot()
+        monitor.publish(snapshot, display=False)
+        for _ in range(args.ticks):
+            kind = project.mutate()
+            started = time.perf_counter()
+            changed = watcher.wait(args.tick_timeout, debounce=args.debounce)
+            if not changed:
+                missed += 1
+                continue
+            detected = time.perf_counter()
+            snapshot = monitor.collect_snapshot(snapshot, changed)
+            monitor.publish(snapshot, display=False)
+            finished = time.perf_counter()
+            latency["all"].append(finished - started)
+            latency[kind].append(finished - started)
+            processing.append(finished - detected)
+            # 公開時のファイル書き込みによるイベントを次のティックに持ち越さない
+            watcher.wait(0)
+    finally:
+        watcher.close()
+        monitor.close()
+    result = {
+        "backend": type(watcher).__name__,
+        "debounce_s": args.debounce,
+        "missed_ticks": missed,
+        "processing": percentiles(processing) if processing else None
+    }
+    for kind, samples in latency.items():
+        result[f"latency_{kind}"] = percentiles(samples) if samples else None
+    return result
+
+
+def bench_memory(module, project, args):
+    """定常状態の更新1回あたりのPythonヒープ使用量と、プロセスの最大RSS"""
+    monitor = create_monitor(module, project, args)
+    try:
+        monitor.generate_dashboard()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for _ in range(max(1, args.iterations // 5)):
+            monitor.generate_dashboard()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        monitor.close()
+    result = {
+        "heap_peak_kib": round((peak - baseline) / 1024, 1),
+        "heap_retained_kib": round((current - baseline) / 1024, 1)
+    }
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux は KiB、macOS は byte 単位
+        result["max_rss_kib"] = max_rss // 1024 if sys.platform == "darwin" else max_rss
+    return result
+
+
+def environment():
+    """比較時に参照する実行環境の情報"""
+    git_version = subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git": git_version
+    }
+
+
+def compare(results, baseline_path):
+    """基準となるベンチマーク結果とのp50/p90比較を表示"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    print(f"\n📊 Comparison with {baseline_path}")
+    print(f"{'metric':<36} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for section, values in results["results"].items():
+        for name, value in values.items():
+            if not isinstance(value, dict):
+                continue
+            before = baseline.get("results", {}).get(section, {}).get(name)
+            if not isinstance(before, dict):
+                continue
+            for key in ("p50_ms", "p90_ms"):
+                if before.get(key):
+                    ratio = value[key] / before[key]
+                    label = f"{section}.{name}.{key}"
+                    print(f"{label:<36} {before[key]:>10.2f} {value[key]:>10.2f} {ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TDD進捗モニターのベンチマーク')
+    parser.add_argument('--agents', type=int, default=len(DEFAULT_AGENTS),
+                        help='worktree数（5を超える分は agent-N として追加）')
+    parser.add_argument('--commit-depth', type=int, default=200, help='各worktreeのコミット数')
+    parser.add_argument('--test-files', type=int, default=5000, help='output/tests 配下のテストファイル数')
+    parser.add_argument('--files-per-dir', type=int, default=100, help='1ディレクトリあたりのテストファイル数')
+    parser.add_argument('--report-cases', type=int, default=5000, help='JUnit XML のテストケース数')
+    parser.add_argument('--coverage-files', type=int, default=2000, help='lcov.info のファイル数')
+    parser.add_argument('--iterations', type=int, default=30, help='generate_dashboard() の計測回数')
+    parser.add_argument('--ticks', type=int, default=30, help='watchティックの計測回数')
+    parser.add_argument('--tick-timeout', type=float, default=10.0, help='変更検知の待ち上限（秒）')
+    parser.add_argument('--watch-backend', choices=['auto', 'inotify', 'poll'], default='auto')
+    parser.add_argument('--poll-interval', type=float, default=0.2, help='pollバックエンドの走査間隔（秒）')
+    parser.add_argument('--debounce', type=float, default=0.05, help='watchティックのデバウンス（秒）')
+    parser.add_argument('--parallel', type=int, default=4, help='エージェント情報の並列取得数')
+    parser.add_argument('--no-history', action='store_true', help='指標履歴を記録しない')
+    parser.add_argument('--seed', type=int, default=0, help='レポート生成の乱数シード')
+    parser.add_argument('--workdir', help='合成プロジェクトの作成先（既定: 一時ディレクトリ）')
+    parser.add_argument('--keep', action='store_true', help='終了後も合成プロジェクトを残す')
+    parser.add_argument('--output', help='結果JSONの出力先（既定: 標準出力）')
+    parser.add_argument('--compare', metavar='BASELINE', help='以前の結果JSONとp50/p90を比較')
+
+    args = parser.parse_args()
+
+    agents = DEFAULT_AGENTS[:args.agents] + [
+        f"agent-{index}" for index in range(len(DEFAULT_AGENTS), args.agents)
+    ]
+    if len(agents) < len(DEFAULT_AGENTS):
+        parser.error(f"--agents は {len(DEFAULT_AGENTS)} 以上を指定してください（フェーズ判定に必要）")
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="tdd-bench-"))
+    if workdir.exists() and any(workdir.iterdir()):
+        parser.error(f"作成先が空ではありません: {workdir}")
+
+    module = load_monitor_module()
+    project = SyntheticProject(
+        workdir, agents,
+        commit_depth=args.commit_depth,
+        test_files=args.test_files,
+        files_per_dir=args.files_per_dir,
+        report_cases=args.report_cases,
+        coverage_files=args.coverage_files,
+        seed=args.seed
+    )
+
+    try:
+        print(f"🏗️ Building synthetic project in {workdir}", file=sys.stderr)
+        started = time.perf_counter()
+        project.build()
+        print(f"   done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        print("⏱️ generate_dashboard()", file=sys.stderr)
+        dashboard = bench_dashboard(module, project, args)
+        print("⏱️ watch ticks", file=sys.stderr)
+        watch = bench_watch(module, project, args)
+        print("⏱️ memory", file=sys.stderr)
+        memory = bench_memory(module, project, args)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "config": {
+            "agents": len(agents),
+            "commit_depth": args.commit_depth,
+            "test_files": args.test_files,
+            "files_per_dir": args.files_per_dir,
+            "report_cases": args.report_cases,
+            "coverage_files": args.coverage_files,
+            "iterations": args.iterations,
+            "ticks": args.ticks,
+            "parallel": args.parallel,
+            "history": not args.no_history
+        },
+        "environment": environment(),
+        "results": {
+            "dashboard": dashboard,
+            "watch": watch,
+            "memory": memory
+        }
+    }
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"✅ Results saved to: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+キャラクター設定（templates/character-configs/*-team/*.yaml）のレジストリ
+TDD・開発チームの生成スクリプトで共有する
+
+設定ディレクトリはカレントディレクトリではなくこのパッケージの位置から解決する。
+YAMLはC実装のCSafeLoaderがあれば使い、解析・検証済みの設定を
+ファイルのmtime・ハッシュをキーにpickleでキャッシュする
+"""
+
+import os
+import pickle
+import hashlib
+from pathlib import Path
+
+import yaml
+
+from claude_md_template import default_cache_dir
+
+CONFIG_ROOT = Path(__file__).resolve().parent.parent / "templates" / "character-configs"
+CACHE_VERSION = 1
+
+# libyaml がない環境では純Python実装にフォールバック
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# テンプレートの描画に必要なキー（ドット区切り）と型
+BASE_SCHEMA = {
+    "character.name": str,
+    "character.description": str,
+    "character.role": str,
+    "personality.traits": list,
+    "personality.communication_style.tone": str,
+    "personality.communication_style.approach": str,
+    "personality.communication_style.catchphrase": str,
+    "speech_patterns.opening": list,
+    "work_style.focus_areas": list,
+    "work_style.quality_standards": list
+}
+SCHEMAS = {
+    "tdd": BASE_SCHEMA,
+    "dev": dict(BASE_SCHEMA, **{
+        "personality.strengths": list,
+        "work_style.decision_process": list
+    })
+}
+OPTIONAL_LISTS = ("speech_patterns.analysis", "speech_patterns.uncertainty")
+
+
+class ConfigError(Exception):
+    """設定ファイルの読み込み・検証エラー"""
+
+
+def validate(config, schema):
+    """必須キーの欠落と型の誤りを列挙（問題がなければ空リスト）"""
+    if not isinstance(config, dict):
+        return ["設定がマッピング形式ではありません"]
+
+    def lookup(path):
+        value = config
+        for key in path.split("."):
+            if not isinstance(value, dict) or key not in value:
+                raise KeyError(path)
+            value = value[key]
+        return value
+
+    missing = []
+    errors = []
+    for path, expected in schema.items():
+        try:
+            value = lookup(path)
+        except KeyError:
+            missing.append(path)
+            continue
+        if not isinstance(value, expected):
+            errors.append(f"{path} は{'リスト' if expected is list else '文字列'}である必要があります")
+    for path in OPTIONAL_LISTS:
+        try:
+            if not isinstance(lookup(path), list):
+                errors.append(f"{path} はリストである必要があります")
+        except KeyError:
+            pass
+    if missing:
+        errors.insert(0, f"必須キーがありません: {', '.join(missing)}")
+    return errors
+
+
+class ConfigRegistry:
+    """チームごとのキャラクター設定の読み込み・検証・キャッシュ"""
+
+    def __init__(self, team, directory=None, cache_dir=None):
+        self.team = team
+        self.schema = SCHEMAS[team]
+        self.directory = Path(directory) if directory else CONFIG_ROOT / f"{team}-team"
+        self.cache_file = Path(cache_dir or default_cache_dir()) / f"configs-{team}.pickle"
+        self._cache = None
+        self._dirty = False
+
+    def names(self):
+        """設定ファイルのあるエージェント名の一覧"""
+        return sorted(path.stem for path in self.directory.glob("*.yaml"))
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_file, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") == CACHE_VERSION and data.get("directory") == str(self.directory):
+                return data["entries"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError, TypeError):
+            pass
+        return {}
+
+    def save(self):
+        """キャッシュを書き出し（書けない環境では何もしない）"""
+        if not self._dirty:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(f".{self.cache_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, "wb") as f:
+                pickle.dump({
+                    "version": CACHE_VERSION,
+                    "directory": str(self.directory),
+                    "entries": self._cache
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def _parse(self, path):
+        """YAMLを解析・検証（mtimeかハッシュが一致すればキャッシュを使う）"""
+        if self._cache is None:
+            self._cache = self._load_cache()
+        stat = path.stat()
+        cached = self._cache.get(path.name)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cached["config"], cached["errors"]
+
+        data = path.read_bytes()
+        digest = hashlib.sha1(data).hexdigest()
+        if cached and cached["sha1"] == digest:
+            # touchされただけなら解析し直さない
+            config, errors = cached["config"], cached["errors"]
+        else:
+            try:
+                config = yaml.load(data, Loader=YAML_LOADER)
+                errors = validate(config, self.schema)
+            except yaml.YAMLError as e:
+                config, errors = None, [f"YAMLの解析に失敗しました: {e}"]
+        self._cache[path.name] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha1": digest,
+            "config": config,
+            "errors": errors
+        }
+        self._dirty = True
+        return config, errors
+
+    def get(self, name, builtin=None):
+        """エージェント設定を取得（YAMLがなければ builtin を使用）"""
+        return self.load_all([name], {name: builtin} if builtin is not None else None)[name]
+
+    def load_all(self, names, builtins=None):
+        """複数のエージェント設定を取得し、問題はまとめて ConfigError で報告"""
+        builtins = builtins or {}
+        configs = {}
+        problems = []
+        for name in names:
+            path = self.directory / f"{name}.yaml"
+            if path.is_file():
+                config, errors = self._parse(path)
+                source = path
+            elif name in builtins:
+                config = builtins[name]
+                errors = validate(config, self.schema)
+                source = f"{name} (内蔵設定)"
+            else:
+                problems.append(f"{name}: 設定ファイルがありません ({path})")
+                continue
+            if errors:
+                problems.extend(f"{source}: {error}" for error in errors)
+            configs[name] = config
+        self.save()
+        if problems:
+            raise ConfigError("キャラクター設定に問題があります\n" + "\n".join(f"  - {p}" for p in problems))
+        return configs
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+CLAUDE.md テンプレートエンジン
+TDD・開発チームの生成スクリプトで共有する
+
+テンプレート（templates/claude-md/*.md）は一度だけ静的チャンクと差し込み枠に分解し、
+コンパイル結果をディスクにキャッシュする。描画時は差し込み枠だけを埋める
+
+書式:
+    ${character.name}             値の差し込み（ドット区切りでネストした値を参照）
+    ${personality.traits|bullets} フィルタ適用（bullets / quoted / numbered）
+    ${speech_patterns.analysis?}  ? を付けると値がなくてもエラーにせず空文字
+    ${>_footer}                   部分テンプレート（_footer.md）の埋め込み
+    $$                            $ そのもの
+
+build_claude_md() は入力（エージェント設定・テンプレート・CLIの値）のハッシュを
+出力先の .claude-md-manifest.json に記録し、入力が変わったときだけ描画・書き出しを行う
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "claude-md"
+VERSION = 1
+MANIFEST_NAME = ".claude-md-manifest.json"
+
+TOKEN = re.compile(r"\$(?:\$|\{([^}]*)\})")
+
+FILTERS = {
+    "bullets": lambda items: "\n".join(f"- {item}" for item in items),
+    "quoted": lambda items: "\n".join(f'- "{item}"' for item in items),
+    "numbered": lambda items: "\n".join(f"{i}. {item}" for i, item in enumerate(items, 1)),
+}
+
+
+class TemplateError(Exception):
+    """テンプレートの構文エラー・差し込み値の不足"""
+
+
+def default_cache_dir():
+    """コンパイル済みテンプレートのキャッシュ先"""
+    if os.environ.get("CLAUDE_MD_TEMPLATE_CACHE"):
+        return Path(os.environ["CLAUDE_MD_TEMPLATE_CACHE"])
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "development-engineering-multiagent" / "claude-md"
+
+
+def _atomic_write(path, content):
+    tmp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_file, path)
+
+
+def split_tech_stack(tech_stack):
+    """"フロント,バック,DB" 形式の技術スタックを分解"""
+    parts = tech_stack.split(',')
+    return {
+        "frontend": parts[0] if len(parts) > 0 else "unknown",
+        "backend": parts[1] if len(parts) > 1 else "unknown",
+        "database": parts[2] if len(parts) > 2 else "unknown"
+    }
+
+
+class CompiledTemplate:
+    """静的チャンクと差し込み枠に分解済みのテンプレート"""
+
+    def __init__(self, name, chunks):
+        self.name = name
+        self.chunks = chunks
+        # 静的チャンクは描画ごとに作り直さない
+        self._parts = [chunk if isinstance(chunk, str) else None for chunk in chunks]
+        self._slots = [
+            (index, tuple(chunk[0]), chunk[1], FILTERS[chunk[2]] if chunk[2] else str)
+            for index, chunk in enumerate(chunks)
+            if not isinstance(chunk, str)
+        ]
+
+    def render(self, context):
+        """差し込み枠だけを埋めて文字列にする"""
+        parts = list(self._parts)
+        for index, path, optional, apply in self._slots:
+            value = context
+            try:
+                for key in path:
+                    value = value[key]
+            except (KeyError, IndexError, TypeError):
+                if not optional:
+                    raise TemplateError(f"{self.name}: ${{{'.'.join(path)}}} の値がありません")
+                parts[index] = ""
+                continue
+            parts[index] = apply(value)
+        return "".join(parts)
+
+
+class TemplateLoader:
+    """テンプレートの読み込み・コンパイル・キャッシュ（メモリとディスク）"""
+
+    def __init__(self, directory=TEMPLATE_DIR, cache_dir=None):
+        self.directory = Path(directory)
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def _source(self, name):
+        path = self.directory / f"{name}.md"
+        try:
+            return path.read_text(encoding="utf-8")
+        except OSError as e:
+            raise TemplateError(f"テンプレートが見つかりません: {path}") from e
+
+    @staticmethod
+    def _digest(source):
+        return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+    def get(self, name):
+        """コンパイル済みテンプレートを取得"""
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.get(name)
+                if compiled is None:
+                    compiled = self._load(name)
+                    self._compiled[name] = compiled
+        return compiled
+
+    def render(self, name, context):
+        """テンプレートを描画"""
+        return self.get(name).render(context)
+
+    def fingerprint(self, name):
+        """コンパイル結果のハッシュ（部分テンプレートの変更も反映される）"""
+        chunks = json.dumps(self.get(name).chunks, ensure_ascii=False)
+        return hashlib.sha1(f"{VERSION}:{chunks}".encode("utf-8")).hexdigest()
+
+    def _load(self, name):
+        source = self._source(name)
+        digest = self._digest(source)
+        cached = self._read_cache(name, digest)
+        if cached is not None:
+            return CompiledTemplate(name, cached)
+
+        dependencies = {}
+        chunks = self._compile(name, source, dependencies, (name,))
+        self._write_cache(name, digest, dependencies, chunks)
+        return CompiledTemplate(name, chunks)
+
+    def _compile(self, name, source, dependencies, stack):
+        """テンプレートを静的チャンクと差し込み枠 [path, optional, filter] の列に分解"""
+        chunks = []
+        text = []
+
+        def flush():
+            if text:
+                chunks.append("".join(text))
+                text.clear()
+
+        position = 0
+        for match in TOKEN.finditer(source):
+            text.append(source[position:match.start()])
+            position = match.end()
+            expression = match.group(1)
+            if expression is None:
+                text.append("$")
+                continue
+
+            expression = expression.strip()
+            if expression.startswith(">"):
+                partial = expression[1:].strip()
+                if partial in stack:
+                    raise TemplateError(f"{name}: 部分テンプレートが循環しています: {partial}")
+                partial_source = self._source(partial)
+                dependencies[partial] = self._digest(partial_source)
+                # 部分テンプレート末尾の改行は埋め込み位置の改行と重複するため除く
+                if partial_source.endswith("\n"):
+                    partial_source = partial_source[:-1]
+                for chunk in self._compile(partial, partial_source, dependencies, stack + (partial,)):
+                    if isinstance(chunk, str):
+                        text.append(chunk)
+                    else:
+                        flush()
+                        chunks.append(chunk)
+                continue
+
+            path, _, filter_name = expression.partition("|")
+            path = path.strip()
+            filter_name = filter_name.strip() or None
+            optional = path.endswith("?")
+            path = path.rstrip("?")
+            if not path or filter_name is not None and filter_name not in FILTERS:
+                raise TemplateError(f"{name}: 不正な差し込み枠です: ${{{expression}}}")
+            flush()
+            chunks.append([path.split("."), optional, filter_name])
+        text.append(source[position:])
+        flush()
+        return chunks
+
+    def _cache_file(self, name):
+        return self.cache_dir / f"{name}.json"
+
+    def _read_cache(self, name, digest):
+        """テンプレート本体と部分テンプレートが変わっていなければキャッシュを使う"""
+        try:
+            with open(self._cache_file(name), encoding="utf-8") as f:
+                data = json.load(f)
+            if (data["version"] != VERSION or data["directory"] != str(self.directory)
+                    or data["digest"] != digest):
+                return None
+            for partial, partial_digest in data["dependencies"].items():
+                if self._digest(self._source(partial)) != partial_digest:
+                    return None
+            return data["chunks"]
+        except (OSError, ValueError, KeyError, TemplateError):
+            return None
+
+    def _write_cache(self, name, digest, dependencies, chunks):
+        """キャッシュに書き出し（書けない環境では何もしない）"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = self._cache_file(name)
+            _atomic_write(cache_file, json.dumps({
+                "version": VERSION,
+                "directory": str(self.directory),
+                "digest": digest,
+                "dependencies": dependencies,
+                "chunks": chunks
+            }, ensure_ascii=False))
+        except OSError:
+            pass
+
+
+default_loader = TemplateLoader()
+
+
+def render(name, context):
+    """既定のローダーでテンプレートを描画"""
+    return default_loader.render(name, context)
+
+
+def build_claude_md(output_dir, template_name, inputs, render_content, force=False, loader=None):
+    """入力が前回の生成時から変わっていなければスキップし、変わったときだけ描画して書き出す
+
+    inputs は描画結果を決める値（エージェント設定・プロジェクト名など）の辞書、
+    render_content は描画処理。戻り値は (出力パス, 書き出したか)
+    """
+    loader = loader or default_loader
+    output_dir = Path(output_dir)
+    output_path = output_dir / "CLAUDE.md"
+    manifest_path = output_dir / MANIFEST_NAME
+    input_digest = hashlib.sha1(json.dumps({
+        "template": template_name,
+        "template_digest": loader.fingerprint(template_name),
+        "inputs": inputs
+    }, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+    if not force:
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            # 手で編集・削除された出力は作り直す
+            output_digest = hashlib.sha1(output_path.read_bytes()).hexdigest()
+            if manifest.get("inputs") == input_digest and manifest.get("output") == output_digest:
+                return output_path, False
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    content = render_content()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    _atomic_write(output_path, content)
+    _atomic_write(manifest_path, json.dumps({
+        "template": template_name,
+        "inputs": input_digest,
+        "output": hashlib.sha1(content.encode("utf-8")).hexdigest()
+    }, indent=2) + "\n")
+    return output_path, True
@@ -3,202 +3,120 @@
 開発チーム用CLAUDE.md生成スクリプト
 """
 
-import yaml
 import argparse
 import os
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from claude_md_template import render as render_template, split_tech_stack, build_claude_md
+from character_config import ConfigRegistry
+
+# templates/character-configs/dev-team/（スクリプトの位置から解決）
+registry = ConfigRegistry("dev")
+
+def list_agents():
+    """設定ファイルのある開発チームのエージェント一覧"""
+    return registry.names()
 
 def load_agent_config(agent_name):
-    """エージェント設定をYAMLから読み込み"""
-    config_path = Path(f"../../development-engineering-multiagent/templates/character-configs/dev-team/{agent_name}.yaml")
-    
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    """エージェント設定をYAMLから読み込み（検証・キャッシュ済み）"""
+    return registry.get(agent_name)
 
 def generate_dev_claude_md(agent_config, project_name, tech_stack):
     """開発チーム用CLAUDE.md生成"""
-    char = agent_config['character']
-    personality = agent_config['personality']
-    speech = agent_config['speech_patterns']
-    work = agent_config['work_style']
+    context = dict(agent_config)
+    context.update(
+        project=dict(split_tech_stack(tech_stack), name=project_name),
+        system_name="Development Engineering MultiAgent System",
+        generated_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    )
+    return render_template("dev", context)
+
+def write_claude_md(agent, agent_config, project_name, tech_stack, output_dir, force=False):
+    """入力（設定・テンプレート・CLIの値）が前回から変わった場合のみCLAUDE.mdを描画・出力"""
+    inputs = {
+        "agent": agent,
+        "config": agent_config,
+        "project_name": project_name,
+        "tech_stack": tech_stack
+    }
+    return build_claude_md(
+        output_dir, "dev", inputs,
+        lambda: generate_dev_claude_md(agent_config, project_name, tech_stack),
+        force=force
+    )
+
+def generate_team(agents, project_name, tech_stack, output_dir, worktree_pattern, jobs=4, force=False):
+    """チーム全員分のCLAUDE.mdを1プロセスで生成（設定読み込みは1回、描画と書き込みはスレッドプールで並列）"""
+    configs = registry.load_all(agents)
     
-    # 技術スタック情報の整理
-    tech_parts = tech_stack.split(',')
-    frontend = tech_parts[0] if len(tech_parts) > 0 else "unknown"
-    backend = tech_parts[1] if len(tech_parts) > 1 else "unknown"
-    database = tech_parts[2] if len(tech_parts) > 2 else "unknown"
-    
-    claude_md = f"""# {char['name']} - {char['description']}
-
-あなたは **{char['name']}** として、{project_name}プロジェクトの{char['role']}を担当します。
-
-## 🎯 プロジェクト情報
-
-- **プロジェクト名**: {project_name}
-- **フロントエンド**: {frontend}
-- **バックエンド**: {backend}
-- **データベース**: {database}
-
-## 🎭 開発チーム構成
-
-### チームメンバー
-- **👨‍💻 Frontend Developer**: UI実装担当
-- **⚙️ Backend Developer**: API実装担当
-- **🧪 Test Engineer**: 品質保証担当
-- **🚀 DevOps Engineer**: インフラ・デプロイ担当
-
-### 連携方法
-- **shared/specs/**: 設計仕様書の参照
-- **shared/data/**: テストデータの共有
-- **sync/**: 進捗報告と課題共有
-- **output/**: 成果物の配置
-
-## 🎭 あなたのキャラクター設定
-
-### 性格・特徴
-{chr(10).join([f"- {trait}" for trait in personality['traits']])}
-
-### 強み
-{chr(10).join([f"- {strength}" for strength in personality['strengths']])}
-
-### コミュニケーションスタイル
-- **口調**: {personality['communication_style']['tone']}
-- **アプローチ**: {personality['communication_style']['approach']}
-- **決めゼリフ**: 「{personality['communication_style']['catchphrase']}」
-
-## 💬 話し方パターン
-
-### 作業開始時
-{chr(10).join([f'- "{opening}"' for opening in speech['opening']])}
-
-### 分析・実装時
-{chr(10).join([f'- "{analysis}"' for analysis in speech.get('analysis', [])])}
-
-### 不明点・困った時
-{chr(10).join([f'- "{uncertain}"' for uncertain in speech.get('uncertainty', [])])}
-
-## 🎯 作業スタイル
-
-### 重視する観点
-{chr(10).join([f"- {area}" for area in work['focus_areas']])}
-
-### 作業プロセス
-{chr(10).join([f"{i+1}. {process}" for i, process in enumerate(work['decision_process'])])}
-
-### 品質基準
-{chr(10).join([f"- {standard}" for standard in work['quality_standards']])}
-
-## 📁 作業ディレクトリ構成
-
-### あなたの作業エリア
-- `work/`: 作業中のファイル
-- `sync/`: 進捗報告とメモ
-
-### 共有エリア（読み取り専用）
-- `shared/specs/`: 設計仕様書
-- `shared/data/`: 共有データ
-
-### 成果物エリア
-- `output/`: あなたが生成したコード
-
-## 🤝 チーム連携の実践
-
-### 進捗報告（sync/daily-report.md）
-```markdown
-## {char['name']} Daily Report - {{date}}
-
-### 本日の作業
-- 完了: 
-- 進行中: 
-- ブロッカー: 
-
-### 明日の予定
-- 
-
-### 他メンバーへの連絡
-- 
-
----
-{char['name']}
-```
-
-### 設計仕様の確認
-```bash
-# 必要な仕様書を確認
-cat shared/specs/architecture/system-architecture.md
-cat shared/specs/api/openapi.yaml
-cat shared/specs/database/database-design.md
-```
-
-### 成果物の配置
-```bash
-# あなたの成果物を適切な場所に配置
-cp work/my-code.js output/frontend/src/
-git add output/
-git commit -m "feat: 機能実装完了"
-```
-
-## ⚡ 実装時の注意事項
-
-### コーディング規約
-- 言語固有のベストプラクティスに従う
-- コメントは適切に（ただし過剰にならない）
-- テスタブルなコードを心がける
-
-### セキュリティ
-- 入力検証の徹底
-- 認証・認可の適切な実装
-- セキュアなデータ処理
-
-### パフォーマンス
-- 効率的なアルゴリズムの選択
-- 適切なキャッシング
-- 非同期処理の活用
-
-## 🚨 重要な心得
-
-1. **設計仕様書を必ず確認**してから実装を開始
-2. **他のメンバーとの連携**を密に保つ
-3. **品質基準を妥協しない**
-4. **問題があれば早めに共有**
-
----
-
-**あなたは{char['name']}です。プロフェッショナルとして、そしてチームの一員として最高の成果を目指してください。**
+    def render(agent):
+        output_path, written = write_claude_md(
+            agent, configs[agent], project_name, tech_stack,
+            Path(output_dir) / worktree_pattern.format(agent=agent), force
+        )
+        return configs[agent]['character']['name'], output_path, written
+        
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(render, agents))
 
-*このエージェント設定は Development Engineering MultiAgent System により生成されました*
-*生成日時: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}*
-"""
-    
-    return claude_md
+def print_result(name, output_path, written):
+    """生成結果の表示"""
+    if written:
+        print(f"✅ {name} の設定を生成: {output_path}")
+    else:
+        print(f"⏭️ {name} の設定は変更なし: {output_path}")
 
 def main():
     parser = argparse.ArgumentParser(description='開発チーム用CLAUDE.md生成')
-    parser.add_argument('--agent', required=True, help='エージェント名')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--agent', help='エージェント名')
+    target.add_argument('--agents', help='一括生成するエージェント（カンマ区切り、allで全員）')
+    target.add_argument('--team', choices=['dev'], help='開発チーム全員分を一括生成（--agents all と同じ）')
     parser.add_argument('--project-name', required=True, help='プロジェクト名')
     parser.add_argument('--tech-stack', required=True, help='技術スタック（カンマ区切り）')
-    parser.add_argument('--output-dir', required=True, help='出力ディレクトリ')
+    parser.add_argument('--output-dir', required=True,
+                        help='出力ディレクトリ（一括生成時は各エージェントのworktreeを含むディレクトリ）')
+    parser.add_argument('--worktree-pattern', default='worktree-{agent}',
+                        help='一括生成時のエージェント別出力先（--output-dir からの相対パス、{agent}を置換）')
+    parser.add_argument('--jobs', type=int, default=4, help='一括生成時の並列数')
+    parser.add_argument('--force', action='store_true', help='入力が変わっていなくても再生成する')
     
     args = parser.parse_args()
     
+    if args.agent is None:
+        if args.team or args.agents == 'all':
+            agents = list_agents()
+        else:
+            agents = [agent.strip() for agent in args.agents.split(',') if agent.strip()]
+        if not agents:
+            print("❌ エラー: 生成対象のエージェントがありません")
+            return 1
+        try:
+            results = generate_team(agents, args.project_name, args.tech_stack,
+                                    args.output_dir, args.worktree_pattern, args.jobs, args.force)
+        except Exception as e:
+            print(f"❌ エラー: {e}")
+            return 1
+        for name, output_path, written in results:
+            print_result(name, output_path, written)
+        return 0
+    
     try:
         # エージェント設定読み込み
         agent_config = load_agent_config(args.agent)
         
-        # CLAUDE.md生成
-        claude_md_content = generate_dev_claude_md(
-            agent_config, 
+        # CLAUDE.md生成（入力が変わっていなければスキップ）
+        output_path, written = write_claude_md(
+            args.agent,
+            agent_config,
             args.project_name,
-            args.tech_stack
+            args.tech_stack,
+            args.output_dir,
+            args.force
         )
-        
-        # ファイル出力
-        output_path = Path(args.output_dir) / "CLAUDE.md"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(claude_md_content)
-            
-        print(f"✅ {agent_config['character']['name']} の設定を生成: {output_path}")
+        print_result(agent_config['character']['name'], output_path, written)
         
     except Exception as e:
         print(f"❌ エラー: {e}")
@@ -4,11 +4,14 @@ TDD開発チーム用CLAUDE.md生成スクリプト
 Test-Driven Development methodology
 """
 
-import yaml
 import argparse
 import os
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from claude_md_template import render as render_template, split_tech_stack, build_claude_md
+from character_config import ConfigRegistry
 
 # TDDエージェント設定（YAMLファイルがない場合の内蔵設定）
 TDD_AGENT_CONFIGS = {
@@ -149,34 +152,20 @@ TDD_AGENT_CONFIGS = {
     }
 }
 
+# templates/character-configs/tdd-team/（スクリプトの位置から解決）
+registry = ConfigRegistry("tdd")
+
+def builtin_config(agent_name):
+    """内蔵設定（未知のエージェントは Test Lead の設定）"""
+    return TDD_AGENT_CONFIGS.get(agent_name, TDD_AGENT_CONFIGS["test-lead"])
+
 def get_agent_config(agent_name):
-    """エージェント設定を取得（内蔵またはYAMLから）"""
-    # まずYAMLファイルを探す
-    yaml_path = Path(f"../../templates/character-configs/tdd-team/{agent_name}.yaml")
-    
-    if yaml_path.exists():
-        with open(yaml_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    else:
-        # 内蔵設定を使用
-        return TDD_AGENT_CONFIGS.get(agent_name, TDD_AGENT_CONFIGS["test-lead"])
+    """エージェント設定を取得（YAMLがあればYAML、なければ内蔵設定）"""
+    return registry.get(agent_name, builtin_config(agent_name))
 
-def generate_tdd_claude_md(agent_config, project_name, tech_stack):
-    """TDD開発チーム用CLAUDE.md生成"""
-    char = agent_config['character']
-    personality = agent_config['personality']
-    speech = agent_config['speech_patterns']
-    work = agent_config['work_style']
-    
-    # 技術スタック情報の整理
-    tech_parts = tech_stack.split(',')
-    frontend = tech_parts[0] if len(tech_parts) > 0 else "unknown"
-    backend = tech_parts[1] if len(tech_parts) > 1 else "unknown"
-    database = tech_parts[2] if len(tech_parts) > 2 else "unknown"
-    
-    # エージェント別の特別な指示
-    agent_specific_instructions = {
-        "test-lead": """
+# エージェント別の特別な指示
+TDD_AGENT_INSTRUCTIONS = {
+    "test-lead": """
 ## 🔴 TDD RED Phase - テスト先行作成
 
 ### あなたの責任
@@ -204,8 +193,8 @@ def generate_tdd_claude_md(agent_config, project_name, tech_stack):
    - 他エージェントへの実装指示
    - 品質基準の明確化
 """,
-        
-        "backend-developer": """
+    
+    "backend-developer": """
 ## 🟢 TDD GREEN Phase - 実装
 
 ### あなたの責任
@@ -224,8 +213,8 @@ def generate_tdd_claude_md(agent_config, project_name, tech_stack):
    - sync/backend-progress.md 更新
    - ブロッカーの早期共有
 """,
-        
-        "frontend-developer": """
+    
+    "frontend-developer": """
 ## 🟢 TDD GREEN Phase - UI実装
 
 ### あなたの責任
@@ -244,8 +233,8 @@ def generate_tdd_claude_md(agent_config, project_name, tech_stack):
    - ユーザー操作のテスト
    - レスポンシブデザインテスト
 """,
-        
-        "review-engineer": """
+    
+    "review-engineer": """
 ## 🔧 TDD REFACTOR Phase - コード改善
 
 ### あなたの責任
@@ -264,8 +253,8 @@ def generate_tdd_claude_md(agent_config, project_name, tech_stack):
    - 具体的な修正案を提示
    - ベストプラクティスの共有
 """,
-        
-        "integration-engineer": """
+    
+    "integration-engineer": """
 ## 🔗 Integration & Deployment
 
 ### あなたの責任
@@ -284,192 +273,104 @@ def generate_tdd_claude_md(agent_config, project_name, tech_stack):
    - 環境変数管理
    - モニタリング設定
 """
+}
+
+def generate_tdd_claude_md(agent_config, project_name, tech_stack, agent_name):
+    """TDD開発チーム用CLAUDE.md生成"""
+    context = dict(agent_config)
+    context.update(
+        project=dict(split_tech_stack(tech_stack), name=project_name),
+        agent_instructions=TDD_AGENT_INSTRUCTIONS.get(agent_name, ""),
+        system_name="TDD-Driven MultiAgent System",
+        generated_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    )
+    return render_template("tdd", context)
+
+def write_claude_md(agent, agent_config, project_name, tech_stack, output_dir, force=False):
+    """入力（設定・テンプレート・CLIの値）が前回から変わった場合のみCLAUDE.mdを描画・出力"""
+    inputs = {
+        "agent": agent,
+        "config": agent_config,
+        "instructions": TDD_AGENT_INSTRUCTIONS.get(agent, ""),
+        "project_name": project_name,
+        "tech_stack": tech_stack
     }
+    return build_claude_md(
+        output_dir, "tdd", inputs,
+        lambda: generate_tdd_claude_md(agent_config, project_name, tech_stack, agent),
+        force=force
+    )
+
+def generate_team(agents, project_name, tech_stack, output_dir, worktree_pattern, jobs=4, force=False):
+    """チーム全員分のCLAUDE.mdを1プロセスで生成（設定読み込みは1回、描画と書き込みはスレッドプールで並列）"""
+    configs = registry.load_all(agents, {agent: builtin_config(agent) for agent in agents})
     
-    claude_md = f"""# {char['name']} - {char['description']}
-
-あなたは **{char['name']}** として、{project_name}プロジェクトの{char['role']}を担当します。
-
-## 🎯 プロジェクト情報
-
-- **プロジェクト名**: {project_name}
-- **開発手法**: Test-Driven Development (TDD)
-- **フロントエンド**: {frontend}
-- **バックエンド**: {backend}
-- **データベース**: {database}
-
-## 🔄 TDD開発サイクル
-
-```
-1. 🔴 RED: テスト作成（失敗）
-2. 🟢 GREEN: 実装（テスト通過）
-3. 🔧 REFACTOR: リファクタリング
-4. 🔄 REPEAT: 次の機能へ
-```
-
-## 🎭 TDD開発チーム
-
-### チーム構成
-- **🎯 Test Lead**: テスト戦略とTDDプロセス管理
-- **⚙️ Backend Developer**: サーバーサイド実装
-- **🎨 Frontend Developer**: クライアントサイド実装
-- **🔍 Review Engineer**: コード品質管理
-- **🚀 Integration Engineer**: 統合とデプロイ
-
-### 連携フロー
-1. Test Lead が要件からテストを作成
-2. Backend/Frontend が実装
-3. Review Engineer がコードレビュー
-4. Integration Engineer が統合・デプロイ
-
-{agent_specific_instructions.get(agent_name, "")}
-
-## 🎭 キャラクター設定
-
-### 性格・特徴
-{chr(10).join([f"- {trait}" for trait in personality['traits']])}
-
-### コミュニケーションスタイル
-- **口調**: {personality['communication_style']['tone']}
-- **アプローチ**: {personality['communication_style']['approach']}
-- **決めゼリフ**: 「{personality['communication_style']['catchphrase']}」
-
-## 💬 話し方パターン
-
-### 作業開始時
-{chr(10).join([f'- "{opening}"' for opening in speech['opening']])}
-
-### 分析・実装時
-{chr(10).join([f'- "{analysis}"' for analysis in speech.get('analysis', [])])}
-
-## 🎯 作業スタイル
-
-### 重視する観点
-{chr(10).join([f"- {area}" for area in work['focus_areas']])}
-
-### 品質基準
-{chr(10).join([f"- {standard}" for standard in work['quality_standards']])}
-
-## 📁 作業ディレクトリ構成
-
-```
-{project_name}/
-├── shared/           # 共有リソース
-│   ├── specs/       # 設計仕様書
-│   ├── data/        # テストデータ
-│   └── questions/   # 質問・課題
-├── sync/            # 同期・連携
-│   ├── daily/       # 日次報告
-│   └── meeting/     # ミーティング記録
-├── output/          # 成果物
-│   ├── backend/     # バックエンドコード
-│   ├── frontend/    # フロントエンドコード
-│   ├── tests/       # テストコード
-│   └── docs/        # ドキュメント
-└── work/            # 個人作業エリア
-```
-
-## 🤝 チーム連携
-
-### 日次報告フォーマット
-```markdown
-## {char['name']} Daily Report - {{{{date}}}}
-
-### 完了したタスク
-- 
-
-### 進行中のタスク
-- 
-
-### ブロッカー
-- 
-
-### 明日の予定
-- 
-
-### 他メンバーへの連絡
-- 
-
----
-{char['name']}
-```
-
-### テスト結果の共有
-```bash
-# テスト実行と結果共有
-npm test -- --coverage > output/tests/coverage-report.txt
-cp coverage/lcov-report/* shared/data/coverage/
-```
-
-## ⚡ TDD実践のコツ
-
-### 1. テストファースト
-- 実装前に必ずテストを書く
-- テストが失敗することを確認
-- 最小限のコードでテストを通す
-
-### 2. 小さなステップ
-- 一度に一つの機能
-- 頻繁にコミット
-- 継続的な統合
-
-### 3. リファクタリング
-- テストが通ったら改善
-- コードの重複を排除
-- 可読性の向上
-
-## 🚨 重要な規則
-
-1. **テストなしのコードはマージしない**
-2. **カバレッジ低下は許可しない**
-3. **壊れたテストは即修正**
-4. **ドキュメントは同時更新**
-
-## 🎯 成功の鍵
-
-- 要件を正確にテストに反映
-- チーム間の密な連携
-- 継続的な改善
-- 品質への妥協なし
-
----
-
-**あなたは{char['name']}です。TDDの原則に従い、高品質なソフトウェアを作り上げてください。**
-
-*「{personality['communication_style']['catchphrase']}」*
+    def render(agent):
+        output_path, written = write_claude_md(
+            agent, configs[agent], project_name, tech_stack,
+            Path(output_dir) / worktree_pattern.format(agent=agent), force
+        )
+        return configs[agent]['character']['name'], output_path, written
+        
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(render, agents))
 
-*このエージェント設定は TDD-Driven MultiAgent System により生成されました*
-*生成日時: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}*
-"""
-    
-    return claude_md
+def print_result(name, output_path, written):
+    """生成結果の表示"""
+    if written:
+        print(f"✅ {name} の設定を生成: {output_path}")
+    else:
+        print(f"⏭️ {name} の設定は変更なし: {output_path}")
 
 def main():
     parser = argparse.ArgumentParser(description='TDD開発チーム用CLAUDE.md生成')
-    parser.add_argument('--agent', required=True, help='エージェント名')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--agent', help='エージェント名')
+    target.add_argument('--agents', help='一括生成するエージェント（カンマ区切り、allで全員）')
+    target.add_argument('--team', choices=['tdd'], help='TDDチーム全員分を一括生成（--agents all と同じ）')
     parser.add_argument('--project-name', required=True, help='プロジェクト名')
     parser.add_argument('--tech-stack', required=True, help='技術スタック（カンマ区切り）')
-    parser.add_argument('--output-dir', required=True, help='出力ディレクトリ')
+    parser.add_argument('--output-dir', required=True,
+                        help='出力ディレクトリ（一括生成時は各エージェントのworktreeを含むディレクトリ）')
+    parser.add_argument('--worktree-pattern', default='worktree-{agent}',
+                        help='一括生成時のエージェント別出力先（--output-dir からの相対パス、{agent}を置換）')
+    parser.add_argument('--jobs', type=int, default=4, help='一括生成時の並列数')
+    parser.add_argument('--force', action='store_true', help='入力が変わっていなくても再生成する')
     
     args = parser.parse_args()
     
+    if args.agent is None:
+        if args.team or args.agents == 'all':
+            agents = list(TDD_AGENT_CONFIGS)
+        else:
+            agents = [agent.strip() for agent in args.agents.split(',') if agent.strip()]
+        if not agents:
+            print("❌ エラー: 生成対象のエージェントがありません")
+            return 1
+        try:
+            results = generate_team(agents, args.project_name, args.tech_stack,
+                                    args.output_dir, args.worktree_pattern, args.jobs, args.force)
+        except Exception as e:
+            print(f"❌ エラー: {e}")
+            return 1
+        for name, output_path, written in results:
+            print_result(name, output_path, written)
+        return 0
+    
     try:
         # エージェント設定取得
         agent_config = get_agent_config(args.agent)
         
-        # CLAUDE.md生成
-        claude_md_content = generate_tdd_claude_md(
-            agent_config, 
+        # CLAUDE.md生成（入力が変わっていなければスキップ）
+        output_path, written = write_claude_md(
+            args.agent,
+            agent_config,
             args.project_name,
-            args.tech_stack
+            args.tech_stack,
+            args.output_dir,
+            args.force
         )
-        
-        # ファイル出力
-        output_path = Path(args.output_dir) / "CLAUDE.md"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(claude_md_content)
-            
-        print(f"✅ {agent_config['character']['name']} の設定を生成: {output_path}")
+        print_result(agent_config['character']['name'], output_path, written)
         
     except Exception as e:
         print(f"❌ エラー: {e}")
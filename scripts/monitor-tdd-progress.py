@@ -5,23 +5,2982 @@ Claude Code Dev方式のリアルタイム進捗追跡
 """
 
 import os
+import re
+import sys
+import glob
+import random
+import shutil
+import unicodedata
 import json
+import html
+import heapq
+import hashlib
+import select
+import sqlite3
+import fnmatch
+import struct
+import ctypes
+import ctypes.util
 import subprocess
+import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
 import time
 import argparse
+import urllib.parse
+import math
+import cProfile
+import pstats
+import threading
+import contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-class TDDProgressMonitor:
-    def __init__(self, project_path):
+
+def format_relative_time(timestamp, now=None):
+    """gitの%ar相当の相対時刻表記を生成"""
+    if now is None:
+        now = time.time()
+    diff = int(now - timestamp)
+    if diff < 0:
+        return "in the future"
+    
+    def ago(value, unit):
+        return f"{value} {unit}{'' if value == 1 else 's'} ago"
+    
+    if diff < 90:
+        return ago(diff, "second")
+    diff = (diff + 30) // 60
+    if diff < 90:
+        return ago(diff, "minute")
+    diff = (diff + 30) // 60
+    if diff < 36:
+        return ago(diff, "hour")
+    diff = (diff + 12) // 24
+    if diff < 14:
+        return ago(diff, "day")
+    if diff < 70:
+        return ago((diff + 3) // 7, "week")
+    if diff < 365:
+        return ago((diff + 15) // 30, "month")
+    if diff < 1825:
+        total_months = (diff * 12 * 2 + 365) // (365 * 2)
+        years, months = divmod(total_months, 12)
+        if months:
+            return f"{years} year{'' if years == 1 else 's'}, {months} month{'' if months == 1 else 's'} ago"
+        return ago(years, "year")
+    return ago((diff + 183) // 365, "year")
+
+
+# format_relative_time の出力（右寄せの空白を含む）。保存済みダッシュボードとの変更判定から除外する
+RELATIVE_TIME_PATTERN = (
+    r" *\b\d+ (?:second|minute|hour|day|week|month|year)s?(?:, \d+ months?)? ago\b|\bin the future\b"
+)
+
+
+class GitRepository:
+    """共有.gitディレクトリの読み取り（refは直接、オブジェクトはcat-file --batchで取得）"""
+
+    def __init__(self, common_dir, spawn, timeout=None):
+        self.common_dir = Path(common_dir)
+        self._spawn = spawn
+        # selectでパイプを待てない環境（Windows）では期限なしで読む
+        self.timeout = timeout if os.name != "nt" else None
+        self._proc = None
+        self._buffer = bytearray()
+        self.lock = threading.Lock()
+        self._packed_refs = {}
+        self._packed_refs_mtime = None
+        
+    def _load_packed_refs(self):
+        """packed-refsを読み込み（更新時のみ再読込）"""
+        packed_file = self.common_dir / "packed-refs"
+        try:
+            mtime = packed_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._packed_refs = {}
+            self._packed_refs_mtime = None
+            return self._packed_refs
+            
+        if mtime != self._packed_refs_mtime:
+            refs = {}
+            with open(packed_file) as f:
+                for line in f:
+                    if line.startswith(("#", "^")):
+                        continue
+                    parts = line.strip().split(" ", 1)
+                    if len(parts) == 2:
+                        refs[parts[1]] = parts[0]
+            self._packed_refs = refs
+            self._packed_refs_mtime = mtime
+        return self._packed_refs
+        
+    @staticmethod
+    def head_ref(gitdir):
+        """HEADが指すブランチ名（detached HEADならNone）"""
+        try:
+            content = (Path(gitdir) / "HEAD").read_text().strip()
+        except OSError:
+            return None
+        return content[5:].strip() if content.startswith("ref: ") else None
+        
+    def resolve_ref(self, gitdir, name="HEAD"):
+        """シンボリックrefを辿ってコミットSHAを取得"""
+        for _ in range(10):
+            # HEADなどworktree固有のrefはgitdir、ブランチは共有ディレクトリにある
+            candidates = [Path(gitdir) / name, self.common_dir / name]
+            content = None
+            for ref_file in candidates:
+                if ref_file.is_file():
+                    content = ref_file.read_text().strip()
+                    break
+                    
+            if content is None:
+                return self._load_packed_refs().get(name)
+            if content.startswith("ref: "):
+                name = content[5:].strip()
+                continue
+            return content
+        return None
+        
+    def _fill(self, deadline):
+        """パイプから読めた分をバッファに追加（EOFならFalse、期限を過ぎたらプロセスを終了して TimeoutExpired）"""
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            ready = remaining > 0 and select.select([self._proc.stdout], [], [], remaining)[0]
+            if not ready:
+                # 応答しないcat-fileは次回の読み込みで起動し直す
+                self._kill()
+                raise subprocess.TimeoutExpired("git cat-file --batch", self.timeout)
+        chunk = os.read(self._proc.stdout.fileno(), 65536)
+        if not chunk:
+            self._kill()
+            return False
+        self._buffer += chunk
+        return True
+        
+    def _kill(self):
+        """cat-fileプロセスを終了し、読み残しを捨てる"""
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+        self._buffer.clear()
+        
+    def _read_object(self, sha):
+        """cat-file --batchプロセスからオブジェクトを読み込み
+        
+        パイプはファイルオブジェクトを介さずselectとos.readで読み、timeout秒で打ち切る
+        """
+        if self._proc is None or self._proc.poll() is not None:
+            self._buffer.clear()
+            self._proc = self._spawn(
+                ["git", f"--git-dir={self.common_dir}", "cat-file", "--batch"]
+            )
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        self._proc.stdin.write(sha.encode() + b"\n")
+        self._proc.stdin.flush()
+        
+        while b"\n" not in self._buffer:
+            if not self._fill(deadline):
+                return None, None
+        end = self._buffer.index(b"\n")
+        header = self._buffer[:end].decode().split()
+        del self._buffer[:end + 1]
+        if len(header) != 3:
+            return None, None
+        obj_type, size = header[1], int(header[2])
+        while len(self._buffer) < size + 1:
+            if not self._fill(deadline):
+                return None, None
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size + 1]
+        return obj_type, data
+        
+    def read_commit(self, sha):
+        """コミットオブジェクトを解析"""
+        obj_type, data = self._read_object(sha)
+        if obj_type != "commit":
+            return None
+            
+        headers, _, message = data.decode("utf-8", "replace").partition("\n\n")
+        parents = []
+        committer_time = 0
+        for line in headers.split("\n"):
+            if line.startswith("parent "):
+                parents.append(line[7:])
+            elif line.startswith("committer "):
+                committer_time = int(line.rsplit(" ", 2)[1])
+        
+        # %s と同様に最初の段落を1行にまとめる
+        subject = " ".join(message.split("\n\n", 1)[0].split("\n")).strip()
+        return {
+            "sha": sha,
+            "parents": parents,
+            "committer_time": committer_time,
+            "subject": subject
+        }
+        
+    def iter_log(self, sha):
+        """コミット日時の新しい順にコミットを列挙（git log相当、必要な分だけ読む）"""
+        with self.lock:
+            commit = self.read_commit(sha)
+        if commit is None:
+            return
+        seen = {sha}
+        frontier = [(-commit["committer_time"], sha, commit)]
+        while frontier:
+            _, _, commit = heapq.heappop(frontier)
+            yield commit
+            for parent in commit["parents"]:
+                if parent in seen:
+                    continue
+                seen.add(parent)
+                with self.lock:
+                    parent_commit = self.read_commit(parent)
+                if parent_commit is not None:
+                    heapq.heappush(frontier, (-parent_commit["committer_time"], parent, parent_commit))
+                    
+    def close(self):
+        """cat-fileプロセスを終了"""
+        if self._proc is not None:
+            self._proc.stdin.close()
+            self._proc.wait()
+            self._proc = None
+
+
+class JsonCacheFile:
+    """バージョン付きJSONキャッシュファイル（一時ファイル経由でアトミックに書き出す）"""
+
+    def __init__(self, path, version):
+        self.path = Path(path)
+        self.version = version
+        
+    def load(self, **expected):
+        """保存内容（version と expected の各キーが一致しなければNone）"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return None
+        if any(data.get(key) != value for key, value in expected.items()):
+            return None
+        return data
+        
+    def save(self, **fields):
+        """version を付けて書き出し"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, **fields}, f)
+        os.replace(tmp_file, self.path)
+
+
+class WorktreeCache:
+    """worktreeのパスをキーにしたエントリのキャッシュ（初回参照時に読み込み、変更があればsaveで書き出す）"""
+
+    VERSION = 1
+
+    def __init__(self, cache_file):
+        self.cache_file = Path(cache_file)
+        self._file = JsonCacheFile(self.cache_file, self.VERSION)
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        
+    def _load(self):
+        """ディスク上のキャッシュを読み込み"""
+        data = self._file.load()
+        entries = data.get("worktrees") if data is not None else None
+        return entries if isinstance(entries, dict) else {}
+        
+    def save(self):
+        """変更があればアトミックに書き出し"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._file.save(worktrees=self._entries)
+            self._dirty = False
+
+
+class CommitCountCache(WorktreeCache):
+    """worktreeごとの (HEADのSHA, コミット数) を保持し、HEADの移動分だけ数え直す
+    
+    HEADが移動したら git rev-list --left-right --count old...new で前回のHEADとの対称差を数え、
+    コミット数 = 前回の数 - old側のみ + new側のみ とする（書き換え後も履歴全体は辿らない）
+    """
+
+    def __init__(self, cache_file, run):
+        super().__init__(cache_file)
+        self._run = run
+        
+    def get(self, worktree_path):
+        """前回記録した {"head", "count", "commit"}（なければNone）"""
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            return self._entries.get(str(worktree_path))
+        
+    def count_since(self, worktree_path, cached, head):
+        """前回の記録からHEADまでのコミット数（数えられなければNone）"""
+        result = self._run(
+            ["git", "rev-list", "--left-right", "--count", f"{cached['head']}...{head}"],
+            worktree_path
+        )
+        if result.returncode != 0:
+            return None
+        try:
+            removed, added = (int(value) for value in result.stdout.split())
+        except ValueError:
+            return None
+        return cached["count"] - removed + added
+        
+    def count_all(self, worktree_path, head):
+        """HEADから到達可能なコミット数（git rev-list --count、数えられなければNone）"""
+        result = self._run(["git", "rev-list", "--count", head], worktree_path)
+        if result.returncode != 0:
+            return None
+        try:
+            return int(result.stdout)
+        except ValueError:
+            return None
+        
+    def set(self, worktree_path, head, count, commit):
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            self._entries[str(worktree_path)] = {"head": head, "count": count, "commit": commit}
+            self._dirty = True
+
+
+class WorktreeStatus:
+    """worktreeの変更ファイル数（ステージ済み・未ステージ・未追跡）
+    
+    git status は --no-optional-locks で実行し、インデックスの更新（index.lockの取得）を
+    行わない。前回実行時から追跡ファイル・ディレクトリ・インデックス・HEAD・除外設定
+    （info/exclude と core.excludesFile）のstatが変わっていなければ git を実行せずに前回の結果を返す
+    """
+
+    COMMAND = ["git", "--no-optional-locks", "status", "--porcelain", "-z", "--untracked-files=normal"]
+    # 直近に更新されたファイルは同一mtime内の変更を見逃さないよう次回も git で確認
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self, run):
+        self._run = run
+        self._entries = {}
+        self._indexes = {}
+        self._excludes = {}
+        self.skipped = 0
+        
+    @staticmethod
+    def _stat_key(path):
+        try:
+            stat = os.lstat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        
+    @staticmethod
+    def parse(output):
+        """status --porcelain -z の出力を集計"""
+        counts = {"files_changed": 0, "files_staged": 0, "files_unstaged": 0, "files_untracked": 0}
+        untracked = []
+        tokens = output.split("\0")
+        position = 0
+        while position < len(tokens):
+            token = tokens[position]
+            position += 1
+            if len(token) < 4:
+                continue
+            x, y, path = token[0], token[1], token[3:]
+            if x in "RC":
+                # 名前変更・コピーは元のパスが続く
+                position += 1
+            if x == "!":
+                continue
+            counts["files_changed"] += 1
+            if x == "?":
+                counts["files_untracked"] += 1
+                untracked.append(path.rstrip("/"))
+                continue
+            if x != " ":
+                counts["files_staged"] += 1
+            if y != " ":
+                counts["files_unstaged"] += 1
+        return counts, untracked
+        
+    @staticmethod
+    def read_index_paths(index_file):
+        """インデックスに登録されたパスの一覧（読めない形式ならNone）"""
+        try:
+            data = Path(index_file).read_bytes()
+        except OSError:
+            return None
+        if len(data) < 12 or data[:4] != b"DIRC":
+            return None
+        version, count = struct.unpack(">II", data[4:12])
+        if version not in (2, 3, 4):
+            return None
+            
+        paths = []
+        position = 12
+        previous = b""
+        try:
+            for _ in range(count):
+                (flags,) = struct.unpack(">H", data[position + 60:position + 62])
+                name_start = position + 62
+                if version >= 3 and flags & 0x4000:
+                    name_start += 2
+                if version == 4:
+                    # 直前のパスと共通の接頭辞を除いた形式
+                    byte = data[name_start]
+                    name_start += 1
+                    strip = byte & 0x7f
+                    while byte & 0x80:
+                        byte = data[name_start]
+                        name_start += 1
+                        strip = ((strip + 1) << 7) | (byte & 0x7f)
+                    end = data.index(b"\0", name_start)
+                    name = previous[:len(previous) - strip] + data[name_start:end]
+                    position = end + 1
+                else:
+                    end = data.index(b"\0", name_start)
+                    name = data[name_start:end]
+                    position += (end - position) // 8 * 8 + 8
+                previous = name
+                paths.append(os.fsdecode(name))
+                
+            # 分割インデックスは共有インデックスのエントリが別ファイルにある
+            while position + 8 <= len(data) - 20:
+                signature = data[position:position + 4]
+                (size,) = struct.unpack(">I", data[position + 4:position + 8])
+                if signature == b"link":
+                    return None
+                position += 8 + size
+        except (struct.error, ValueError, IndexError):
+            return None
+        return paths
+        
+    def _watched_paths(self, index_file, untracked):
+        """stat比較の対象（追跡ファイル・その親ディレクトリ・未追跡のパス）"""
+        stat_key = self._stat_key(index_file)
+        cached = self._indexes.get(index_file)
+        if cached is None or cached[0] != stat_key:
+            cached = (stat_key, self.read_index_paths(index_file))
+            self._indexes[index_file] = cached
+        tracked = cached[1]
+        if tracked is None:
+            return None
+        directories = {""}
+        for path in tracked:
+            parent = path.rpartition("/")[0]
+            while parent not in directories:
+                directories.add(parent)
+                parent = parent.rpartition("/")[0]
+        return sorted(directories) + tracked + untracked
+        
+    def _ignore_sources(self, worktree_path, common_dir):
+        """未追跡ファイルの判定に影響する除外設定のファイル
+        
+        core.excludesFile は設定ファイルのstatが変わったときだけ git config で解決し直す
+        """
+        config_home = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
+        configs = [common_dir / "config", Path.home() / ".gitconfig", config_home / "git" / "config"]
+        config_keys = [self._stat_key(path) for path in configs]
+        cached = self._excludes.get(common_dir)
+        if cached is None or cached[0] != config_keys:
+            result = self._run(["git", "config", "--path", "--get", "core.excludesFile"], worktree_path)
+            value = result.stdout.strip() if result.returncode == 0 else ""
+            excludes_file = worktree_path / value if value else config_home / "git" / "ignore"
+            cached = (config_keys, configs + [common_dir / "info" / "exclude", excludes_file])
+            self._excludes[common_dir] = cached
+        return cached[1]
+        
+    def _fingerprint(self, worktree_path, index_file, head, paths, sources):
+        """stat結果の一覧（直近に更新されたものがあればNone）"""
+        keys = [head, self._stat_key(index_file)]
+        keys.extend(self._stat_key(path) for path in sources)
+        keys.extend(self._stat_key(worktree_path / path if path else worktree_path) for path in paths)
+        threshold = time.time_ns() - self.RACY_WINDOW_NS
+        if any(key is not None and key[0] > threshold for key in keys[1:]):
+            return None
+        return keys
+        
+    def changes(self, worktree_path, head=None):
+        """変更ファイル数を取得（取得できなければNone）
+        
+        head には現在のHEADのSHAを渡す（コミットでインデックスが変わらない場合の検出用）
+        """
+        worktree_path = Path(worktree_path)
+        location = GitQueryEngine.locate(worktree_path)
+        if location is None:
+            return None
+        index_file = location[0] / "index"
+        sources = self._ignore_sources(worktree_path, location[1])
+        key = str(worktree_path)
+        
+        entry = self._entries.get(key)
+        if entry is not None and entry["fingerprint"] is not None:
+            if self._fingerprint(worktree_path, index_file, head, entry["paths"], sources) == entry["fingerprint"]:
+                self.skipped += 1
+                return entry["counts"]
+                
+        result = self._run(self.COMMAND, worktree_path)
+        if result.returncode != 0:
+            self._entries.pop(key, None)
+            return None
+        counts, untracked = self.parse(result.stdout)
+        
+        # git 実行中の変更は直近の更新として検出されるため、実行後のstatで問題ない
+        paths = self._watched_paths(index_file, untracked)
+        fingerprint = None
+        if paths is not None:
+            fingerprint = self._fingerprint(worktree_path, index_file, head, paths, sources)
+        self._entries[key] = {"counts": counts, "paths": paths, "fingerprint": fingerprint}
+        return counts
+
+
+class ChurnTracker(WorktreeCache):
+    """エージェントごとのコミット単位の追加・削除行数（git log --numstat）
+    
+    前回処理したHEADとの対称差（old...new）だけを git log --left-right で読み、
+    old 側にしかないコミット（書き換えで外れたもの）を除いて new 側を加える。
+    直近 window 秒のコミットをキャッシュに保持し、HEADが変わらなければ git を実行しない
+    """
+
+    # コミットの区切り（%x1e）に続けて left/right の印・SHA・コミット日時
+    COMMAND = ["git", "log", "--numstat", "--no-renames", "--format=%x1e%m %H %ct"]
+
+    def __init__(self, run, cache_file, window=86400):
+        super().__init__(cache_file)
+        self._run = run
+        self.window = window
+        
+    @staticmethod
+    def parse(output):
+        """git log --numstat の出力をコミットごとに集計（新しい順、side は "<" か ">"）"""
+        commits = []
+        for block in output.split("\x1e")[1:]:
+            header, _, numstat = block.partition("\n")
+            side, _, header = header.partition(" ")
+            sha, _, timestamp = header.partition(" ")
+            added = deleted = files = 0
+            for line in numstat.splitlines():
+                fields = line.split("\t", 2)
+                if len(fields) != 3:
+                    continue
+                files += 1
+                # バイナリファイルは "-" になる
+                if fields[0].isdigit():
+                    added += int(fields[0])
+                if fields[1].isdigit():
+                    deleted += int(fields[1])
+            commits.append({
+                "side": side,
+                "sha": sha,
+                "timestamp": int(timestamp or 0),
+                "added": added,
+                "deleted": deleted,
+                "files": files
+            })
+        return commits
+        
+    def _log(self, worktree_path, *revisions):
+        result = self._run(self.COMMAND + list(revisions), worktree_path)
+        if result.returncode != 0:
+            return None
+        commits = self.parse(result.stdout)
+        for commit in commits:
+            commit.pop("side")
+        return commits
+        
+    def _advance(self, worktree_path, entry, head):
+        """前回のコミット一覧を old...new の対称差で更新（HEADのコミットがなければNone）"""
+        result = self._run(self.COMMAND + ["--left-right", f"{entry['head']}...{head}"], worktree_path)
+        if result.returncode != 0:
+            return None
+        removed = set()
+        added = []
+        for commit in self.parse(result.stdout):
+            if commit.pop("side") == "<":
+                removed.add(commit["sha"])
+            else:
+                added.append(commit)
+        commits = added + [c for c in entry["commits"] if c["sha"] not in removed]
+        # 最新のコミット（HEAD）を先頭に置く。reset で戻った先が期間外ならキャッシュにない
+        commits.sort(key=lambda c: (c["sha"] != head, -c["timestamp"]))
+        if not commits or commits[0]["sha"] != head:
+            return None
+        return commits
+        
+    def update(self, worktree_path, head, now=None):
+        """HEADまでのコミットを取り込み、直近コミットと期間内の集計を返す（取得不可ならNone）"""
+        if now is None:
+            now = time.time()
+        key = str(worktree_path)
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            entry = self._entries.get(key)
+            
+        if entry is None or entry["head"] != head:
+            commits = None
+            if entry is not None:
+                commits = self._advance(worktree_path, entry, head)
+            if commits is None:
+                # 初回・前回のHEADが読めない場合は期間内のみ読む（期間内になければ直近1件）
+                commits = self._log(worktree_path, f"--since={int(now - self.window)}", head)
+                if commits == []:
+                    commits = self._log(worktree_path, "-1", head)
+                if commits is None:
+                    return None
+            entry = {"head": head, "commits": commits}
+            
+        # 期間外のコミットは直近1件を除いて捨てる
+        since = now - self.window
+        recent = entry["commits"][:1] + [c for c in entry["commits"][1:] if c["timestamp"] >= since]
+        if recent != entry["commits"] or self._entries.get(key) is not entry:
+            entry = {"head": head, "commits": recent}
+            with self._lock:
+                self._entries[key] = entry
+                self._dirty = True
+                
+        in_window = [c for c in recent if c["timestamp"] >= since]
+        return {
+            "last_commit": recent[0] if recent else None,
+            "window": {
+                "commits": len(in_window),
+                "added": sum(c["added"] for c in in_window),
+                "deleted": sum(c["deleted"] for c in in_window)
+            }
+        }
+
+
+class GitQueryEngine:
+    """全worktreeのgit情報を最小限のプロセス数で取得"""
+
+    def __init__(self, spawn, timeout=None):
+        self._spawn = spawn
+        self.timeout = timeout
+        self._repositories = {}
+        self._lock = threading.Lock()
+        
+    @staticmethod
+    def locate(worktree_path):
+        """worktreeのgitdirと共有.gitディレクトリを特定"""
+        dot_git = Path(worktree_path) / ".git"
+        if dot_git.is_dir():
+            gitdir = dot_git
+        elif dot_git.is_file():
+            content = dot_git.read_text().strip()
+            if not content.startswith("gitdir: "):
+                return None
+            gitdir = (Path(worktree_path) / content[8:]).resolve()
+        else:
+            return None
+            
+        commondir_file = gitdir / "commondir"
+        if commondir_file.exists():
+            common_dir = (gitdir / commondir_file.read_text().strip()).resolve()
+        else:
+            common_dir = gitdir.resolve()
+        return gitdir, common_dir
+        
+    def repository(self, common_dir):
+        """共有.gitディレクトリごとのリーダーを取得"""
+        with self._lock:
+            if common_dir not in self._repositories:
+                self._repositories[common_dir] = GitRepository(common_dir, self._spawn, self.timeout)
+            return self._repositories[common_dir]
+        
+    def head_summary(self, worktree_path, counts):
+        """最新コミットとコミット数を取得（取得不可ならNone）
+        
+        counts（CommitCountCache）に記録したHEADから変わっていなければオブジェクトを読まず、
+        変わっていれば前回のHEADとの差分のみ数える（初回は git rev-list --count）
+        """
+        location = self.locate(worktree_path)
+        if location is None:
+            return None
+        gitdir, common_dir = location
+        repo = self.repository(common_dir)
+        
+        # cat-fileプロセスは共有のため、リポジトリ単位で直列化
+        with repo.lock:
+            sha = repo.resolve_ref(gitdir)
+            if sha is None:
+                return None
+            cached = counts.get(worktree_path)
+            if cached is not None and cached["head"] == sha:
+                return {"commit": cached["commit"], "commit_count": cached["count"]}
+                
+            commit = repo.read_commit(sha)
+            if commit is None:
+                return None
+                
+        # rev-list の実行中は cat-file を他のworktreeに譲る
+        count = counts.count_since(worktree_path, cached, sha) if cached is not None else None
+        if count is None:
+            # 初回と、前回のHEADが消えた（書き換え後にgcされた等）場合は数え直す
+            count = counts.count_all(worktree_path, sha)
+            if count is None:
+                return None
+        counts.set(worktree_path, sha, count, commit)
+        return {
+            "commit": commit,
+            "commit_count": count
+        }
+        
+    def iter_log(self, worktree_path):
+        """worktreeのHEADからコミット日時の新しい順に列挙"""
+        location = self.locate(worktree_path)
+        if location is None:
+            return iter(())
+        gitdir, common_dir = location
+        repo = self.repository(common_dir)
+        with repo.lock:
+            sha = repo.resolve_ref(gitdir)
+        if sha is None:
+            return iter(())
+        return repo.iter_log(sha)
+        
+    def close(self):
+        """全リポジトリのプロセスを終了"""
+        for repo in self._repositories.values():
+            repo.close()
+        self._repositories.clear()
+
+
+class FileWatcher:
+    """ファイル変更監視の共通処理（デバウンス付き）"""
+
+    def add(self, directory, keys, names=None, recursive=False):
+        """ディレクトリを監視対象に追加（namesで対象ファイルを限定）"""
+        raise NotImplementedError
+        
+    def _poll_changes(self, timeout):
+        """timeout秒以内に発生した変更のキー集合を返す"""
+        raise NotImplementedError
+        
+    def wait(self, timeout, debounce=0.25, max_delay=1.0):
+        """変更を待ち、連続した変更は1回分にまとめて返す"""
+        changed = self._poll_changes(timeout)
+        if not changed:
+            return changed
+            
+        # 連続コミットなどのバーストが収まるまで待つ（最大max_delay秒）
+        deadline = time.monotonic() + max_delay
+        while True:
+            remaining = min(debounce, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            more = self._poll_changes(remaining)
+            if not more:
+                break
+            changed |= more
+        return changed
+        
+    def close(self):
+        """監視リソースを解放"""
+        pass
+        
+    @staticmethod
+    def _covers(entry, keys, names):
+        """登録済みの設定が keys・names を含んでいるか"""
+        if names is None:
+            return set(keys) <= entry["any_keys"]
+        return all(set(keys) <= entry["names"].get(name, set()) for name in names)
+        
+    @staticmethod
+    def walk_dirs(directory):
+        """directory 以下の全ディレクトリ（d_typeで判定し、ファイルはstatしない）"""
+        dirs = [Path(directory)]
+        pending = [Path(directory)]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            path = Path(entry.path)
+                            dirs.append(path)
+                            pending.append(path)
+            except OSError:
+                continue
+        return dirs
+
+
+class InotifyWatcher(FileWatcher):
+    """Linux inotify（ctypes経由）による変更監視"""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watches = {}
+        self._paths = {}
+        
+    def add(self, directory, keys, names=None, recursive=False):
+        directory = Path(directory)
+        if not directory.is_dir():
+            return False
+        # 登録済みの再帰watchは辿り直さない（以降の新規ディレクトリは IN_CREATE で追加される）
+        entry = self._watches.get(self._paths.get(directory))
+        if recursive and entry is not None and entry["recursive"] and self._covers(entry, keys, names):
+            return True
+        for sub_dir in self.walk_dirs(directory) if recursive else [directory]:
+            self._add_watch(sub_dir, keys, names, recursive)
+        return True
+        
+    def _add_watch(self, directory, keys, names, recursive):
+        """1ディレクトリ分のwatchを登録（同一パスは設定をマージ）"""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), self.WATCH_MASK)
+        if wd < 0:
+            return
+        self._paths[directory] = wd
+        entry = self._watches.setdefault(wd, {
+            "path": directory,
+            "any_keys": set(),
+            "names": {},
+            "recursive": False
+        })
+        if names is None:
+            entry["any_keys"] |= set(keys)
+        else:
+            for name in names:
+                entry["names"].setdefault(name, set()).update(keys)
+        entry["recursive"] = entry["recursive"] or recursive
+        
+    def _poll_changes(self, timeout):
+        # 監視対象外のイベントしか来なかった場合はタイムアウトまで待ち続ける
+        deadline = time.monotonic() + timeout
+        while True:
+            ready, _, _ = select.select([self._fd], [], [], max(0, deadline - time.monotonic()))
+            if not ready:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed
+                
+    def _read_events(self):
+        """溜まっているイベントを読み出して変更キー集合に変換"""
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+            
+        changed = set()
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0").decode("utf-8", "replace")
+            offset += name_len
+            
+            if mask & self.IN_Q_OVERFLOW:
+                # イベント取りこぼし時は全セクションを再計算
+                for entry in self._watches.values():
+                    changed |= self._entry_keys(entry)
+                continue
+            entry = self._watches.get(wd)
+            if entry is None:
+                continue
+            if mask & self.IN_IGNORED:
+                del self._watches[wd]
+                if self._paths.get(entry["path"]) == wd:
+                    del self._paths[entry["path"]]
+                continue
+                
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO) and entry["recursive"]:
+                new_dir = entry["path"] / name
+                if entry["any_keys"]:
+                    self.add(new_dir, entry["any_keys"], recursive=True)
+                for watched_name, keys in entry["names"].items():
+                    self.add(new_dir, keys, {watched_name}, recursive=True)
+                    
+            if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                changed |= self._entry_keys(entry)
+            else:
+                changed |= entry["any_keys"]
+                changed |= entry["names"].get(name, set())
+        return changed
+        
+    @staticmethod
+    def _entry_keys(entry):
+        """watchに紐づく全キー"""
+        keys = set(entry["any_keys"])
+        for name_keys in entry["names"].values():
+            keys |= name_keys
+        return keys
+        
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(FileWatcher):
+    """mtimeポーリングによる変更監視（inotify非対応環境用）
+    
+    再帰監視はディレクトリの一覧を保持してディレクトリだけをstatし、
+    mtimeが変わったディレクトリのみ読み直して一覧を更新する
+    """
+
+    def __init__(self, poll_interval=0.5):
+        self.poll_interval = poll_interval
+        self._entries = {}
+        self._signatures = {}
+        
+    def add(self, directory, keys, names=None, recursive=False):
+        directory = Path(directory)
+        if not directory.is_dir():
+            return False
+        entry = self._entries.get(directory)
+        if entry is not None and (entry["recursive"] or not recursive) and self._covers(entry, keys, names):
+            return True
+        entry = self._entries.setdefault(directory, {
+            "any_keys": set(),
+            "names": {},
+            "recursive": False,
+            "dirs": {directory}
+        })
+        if names is None:
+            entry["any_keys"] |= set(keys)
+        else:
+            for name in names:
+                entry["names"].setdefault(name, set()).update(keys)
+        if recursive and not entry["recursive"]:
+            entry["recursive"] = True
+            entry["dirs"] = set(self.walk_dirs(directory))
+            
+        # 未登録のパスのみ現在の状態を基準として記録
+        for path, keys, stat in self._scan(directory, entry):
+            self._signatures.setdefault(path, stat)
+        return True
+        
+    @staticmethod
+    def _scan(directory, entry):
+        """監視パスごとに (パス, キー, mtime) を列挙"""
+        paths = []
+        if entry["any_keys"]:
+            paths += [(d, entry["any_keys"]) for d in entry["dirs"]]
+        paths += [(directory / name, keys) for name, keys in entry["names"].items()]
+        
+        for path, keys in paths:
+            try:
+                stat = path.stat()
+                yield path, keys, (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                yield path, keys, None
+                
+    def _update_dirs(self, directory, entry, changed_dirs):
+        """mtimeの変わったディレクトリを読み直し、追加・削除されたサブディレクトリを反映"""
+        for path in changed_dirs:
+            try:
+                with os.scandir(path) as entries:
+                    subdirs = {Path(e.path) for e in entries if e.is_dir(follow_symlinks=False)}
+            except OSError:
+                # 削除されたディレクトリ（監視の起点は再作成に備えて残す）
+                subdirs = set()
+                if path != directory:
+                    entry["dirs"].discard(path)
+            known = {d for d in entry["dirs"] if d.parent == path}
+            for removed in known - subdirs:
+                entry["dirs"] = {d for d in entry["dirs"] if d != removed and removed not in d.parents}
+            for added in subdirs - known:
+                for new_dir in self.walk_dirs(added):
+                    entry["dirs"].add(new_dir)
+                    try:
+                        stat = new_dir.stat()
+                        self._signatures[new_dir] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        self._signatures[new_dir] = None
+                        
+    def _poll_changes(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = set()
+            for directory, entry in self._entries.items():
+                changed_dirs = []
+                for path, keys, stat in list(self._scan(directory, entry)):
+                    if self._signatures.get(path, stat) != stat:
+                        changed |= keys
+                        if path in entry["dirs"]:
+                            changed_dirs.append(path)
+                    self._signatures[path] = stat
+                if entry["recursive"] and changed_dirs:
+                    self._update_dirs(directory, entry, changed_dirs)
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.poll_interval, remaining))
+
+
+def create_file_watcher(backend="auto", poll_interval=0.5):
+    """利用可能な変更監視バックエンドを選択"""
+    if backend in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            if backend == "inotify":
+                raise
+    elif backend == "inotify":
+        raise OSError("inotify is only available on Linux")
+    return PollingWatcher(poll_interval)
+
+
+class TestFileIndex:
+    """output/tests 配下のテストファイル索引（ディレクトリのmtime/inodeで差分更新）"""
+
+    PATTERNS = ("*.test.*", "*_test.*")
+    REPORT_SUFFIXES = (".xml", ".json")
+    VERSION = 2
+
+    def __init__(self, root, cache_file):
+        self.root = Path(root)
+        self.cache_file = Path(cache_file)
+        self._file = JsonCacheFile(self.cache_file, self.VERSION)
+        self._dirs = None
+        self.scanned_dirs = 0
+        
+    def _load(self):
+        """ディスク上の索引を読み込み"""
+        data = self._file.load(root=str(self.root))
+        dirs = data.get("dirs") if data is not None else None
+        return dirs if isinstance(dirs, dict) else {}
+        
+    def _save(self):
+        """索引をアトミックに書き出し"""
+        self._file.save(root=str(self.root), dirs=self._dirs)
+        
+    @classmethod
+    def is_test_file(cls, name):
+        """いずれかのパターンに一致するか（両方に一致しても1件）"""
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in cls.PATTERNS)
+        
+    def refresh(self):
+        """変更のあったディレクトリのみ再走査して索引を更新"""
+        if self._dirs is None:
+            self._dirs = self._load()
+        self.scanned_dirs = 0
+        if not self.root.is_dir():
+            if self._dirs:
+                self._dirs = {}
+                self._save()
+            return self._dirs
+            
+        now_ns = time.time_ns()
+        updated = {}
+        dirty = False
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            path = self.root / rel_dir if rel_dir else self.root
+            try:
+                stat = path.stat()
+            except OSError:
+                dirty = True
+                continue
+                
+            cached = self._dirs.get(rel_dir)
+            if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["ino"] == stat.st_ino:
+                entry = cached
+            else:
+                entry = self._scan_dir(path, stat, now_ns)
+                dirty = True
+            updated[rel_dir] = entry
+            pending.extend(f"{rel_dir}/{name}" if rel_dir else name for name in entry["subdirs"])
+            
+        if dirty or updated.keys() != self._dirs.keys():
+            self._dirs = updated
+            self._save()
+        return self._dirs
+        
+    def _scan_dir(self, path, stat, now_ns):
+        """1ディレクトリを走査"""
+        self.scanned_dirs += 1
+        files = []
+        subdirs = []
+        reports = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif self.is_test_file(entry.name):
+                    files.append(entry.name)
+                elif entry.name.endswith(self.REPORT_SUFFIXES):
+                    reports.append(entry.name)
+                    
+        # 直近に更新されたディレクトリは同一mtime内の追加変更を見逃さないよう次回も再走査
+        mtime_ns = stat.st_mtime_ns if now_ns - stat.st_mtime_ns > 2_000_000_000 else None
+        return {
+            "mtime_ns": mtime_ns,
+            "ino": stat.st_ino,
+            "files": files,
+            "subdirs": subdirs,
+            "reports": reports
+        }
+        
+    def count(self):
+        """テストファイル数"""
+        return sum(len(entry["files"]) for entry in self.refresh().values())
+        
+    def report_files(self):
+        """テスト結果レポート候補（*.xml, *.json）の一覧"""
+        if self._dirs is None:
+            self.refresh()
+        return [
+            self.root / rel_dir / name
+            for rel_dir, entry in self._dirs.items()
+            for name in entry["reports"]
+        ]
+
+
+class JsonEventReader:
+    """JSONを逐次読み込み、浅い階層の値を (キーパス, 値) で列挙するストリーミングリーダー"""
+
+    OBJECT = object()
+    ARRAY = object()
+    MAX_TOKEN_SIZE = 16 * 1024 * 1024
+    STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+    TOKEN = re.compile(
+        r'\s*(?:([{}\[\]:,])|"([^"\\]*(?:\\.[^"\\]*)*)"|(-?[0-9][0-9.eE+-]*|[a-z]+))',
+        re.S
+    )
+    SKIP_PLAIN = re.compile(r'[^"\[\]{}]*')
+    SKIP_STRING = re.compile(STRING, re.S)
+
+    def __init__(self, chunk_size=65536):
+        self.chunk_size = chunk_size
+        self._file = None
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        
+    def _fill(self):
+        """未処理部分を残してチャンクを追加読み込み"""
+        if self._eof:
+            raise ValueError("unexpected end of JSON")
+        if len(self._buffer) - self._pos > self.MAX_TOKEN_SIZE:
+            raise ValueError("JSON token too large")
+        chunk = self._file.read(self.chunk_size)
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        self._eof = not chunk
+        
+    def _next_token(self):
+        """次のトークン (種別, 文字列) を返す（終端ならNone）"""
+        while True:
+            match = self.TOKEN.match(self._buffer, self._pos)
+            if match is None or (match.end() == len(self._buffer) and not self._eof):
+                if self._eof:
+                    if self._buffer[self._pos:].strip():
+                        raise ValueError("invalid JSON")
+                    return None
+                self._fill()
+                continue
+            self._pos = match.end()
+            return match.lastindex, match.group(match.lastindex)
+            
+    def _skip_container(self):
+        """開始括弧の直後から対応する閉じ括弧までを読み飛ばす"""
+        depth = 1
+        while depth:
+            self._pos = self.SKIP_PLAIN.match(self._buffer, self._pos).end()
+            if self._pos >= len(self._buffer):
+                self._fill()
+                continue
+            char = self._buffer[self._pos]
+            if char == '"':
+                match = self.SKIP_STRING.match(self._buffer, self._pos)
+                if match is None:
+                    self._fill()
+                    continue
+                self._pos = match.end()
+            else:
+                depth += 1 if char in "[{" else -1
+                self._pos += 1
+                
+    def events(self, path, max_depth=1, descend=None):
+        """max_depth以下の階層のスカラー値とコンテナ開始を列挙
+        
+        descend(キーパス) が False を返したコンテナは中身を解析せずに読み飛ばす
+        """
+        # 各フレーム: [オブジェクトか, 現在のキー/インデックス, キー待ちか]
+        stack = []
+        with open(path, encoding="utf-8") as f:
+            self._file = f
+            self._buffer, self._pos, self._eof = "", 0, False
+            while True:
+                token = self._next_token()
+                if token is None:
+                    return
+                kind, text = token
+                frame = stack[-1] if stack else None
+                if kind == 1:
+                    if text in "{[":
+                        key_path = tuple(fr[1] for fr in stack)
+                        yield key_path, self.OBJECT if text == "{" else self.ARRAY
+                        if len(stack) >= max_depth or (descend is not None and not descend(key_path)):
+                            self._skip_container()
+                        else:
+                            stack.append([True, None, True] if text == "{" else [False, 0, False])
+                    elif text in "}]":
+                        stack.pop()
+                    elif text == "," and frame is not None:
+                        if frame[0]:
+                            frame[2] = True
+                        else:
+                            frame[1] += 1
+                    continue
+                    
+                if kind == 2 and frame is not None and frame[0] and frame[2]:
+                    frame[1] = json.loads(f'"{text}"')
+                    frame[2] = False
+                    continue
+                    
+                yield tuple(fr[1] for fr in stack), json.loads(f'"{text}"' if kind == 2 else text)
+
+
+class JUnitXmlParser:
+    """JUnit XML（pytest --junitxml 含む）の逐次解析"""
+
+    name = "junit-xml"
+    suffixes = (".xml",)
+
+    @staticmethod
+    def _local_name(tag):
+        return tag.rsplit("}", 1)[-1]
+        
+    def parse(self, path):
+        result = {"passed": 0, "failed": 0, "skipped": 0}
+        root_checked = False
+        for event, elem in ET.iterparse(path, events=("start", "end")):
+            tag = self._local_name(elem.tag)
+            if not root_checked:
+                if tag not in ("testsuites", "testsuite"):
+                    return None
+                root_checked = True
+            if event != "end":
+                continue
+                
+            if tag == "testcase":
+                outcomes = {self._local_name(child.tag) for child in elem}
+                if outcomes & {"failure", "error"}:
+                    result["failed"] += 1
+                elif "skipped" in outcomes:
+                    result["skipped"] += 1
+                else:
+                    result["passed"] += 1
+                elem.clear()
+            elif tag == "testsuite":
+                # 処理済みのtestcaseを解放してメモリ使用量を抑える
+                elem.clear()
+        return result if root_checked else None
+
+
+class JestJsonParser:
+    """jest --json 出力の解析（先頭の集計値のみ読み込む）"""
+
+    name = "jest-json"
+    suffixes = (".json",)
+    KEYS = {
+        "numPassedTests": "passed",
+        "numFailedTests": "failed",
+        "numPendingTests": "skipped"
+    }
+
+    def parse(self, path):
+        result = {}
+        for key_path, value in JsonEventReader().events(path, max_depth=1):
+            if not key_path:
+                if value is not JsonEventReader.OBJECT:
+                    return None
+                continue
+            key = key_path[0]
+            if key in self.KEYS:
+                result[self.KEYS[key]] = int(value)
+                if len(result) == len(self.KEYS):
+                    return result
+            elif not key.startswith("num") and not result:
+                # Jestの出力は集計値（num*）から始まる
+                return None
+            elif key == "testResults":
+                break
+        return {"passed": 0, "failed": 0, "skipped": 0, **result} if result else None
+
+
+class PytestJsonParser:
+    """pytest-json-report 出力の解析（summaryのみ読み込む）"""
+
+    name = "pytest-json"
+    suffixes = (".json",)
+    HEADER_KEYS = {"created", "duration", "exitcode", "root", "environment", "summary"}
+
+    def parse(self, path):
+        result = None
+        for key_path, value in JsonEventReader().events(path, max_depth=2):
+            if not key_path:
+                if value is not JsonEventReader.OBJECT:
+                    return None
+                continue
+            key = key_path[0]
+            if key not in self.HEADER_KEYS:
+                if result is None:
+                    return None
+                # summary以降の詳細（collectors/tests）は読まない
+                break
+            if key == "summary" and len(key_path) == 2 and isinstance(value, int):
+                if result is None:
+                    result = {"passed": 0, "failed": 0, "skipped": 0}
+                outcome = key_path[1]
+                if outcome == "passed":
+                    result["passed"] += value
+                elif outcome in ("failed", "error"):
+                    result["failed"] += value
+                elif outcome in ("skipped", "xfailed"):
+                    result["skipped"] += value
+        return result
+
+
+class TestResultIngestor:
+    """テスト結果レポートの取り込み（ファイル内容のハッシュで解析結果をキャッシュ）
+    
+    ディレクトリごとに最新のレポートから run_window 秒以内のものを最新の実行とみなし、
+    それより古いレポートは数えない。1回の実行が複数形式で出力されている場合
+    （pytest --junitxml と pytest-json-report 等）は parsers の順で先の形式のみ数える
+    """
+
+    VERSION = 2
+
+    def __init__(self, cache_file, parsers=None, run_window=300):
+        self.cache_file = Path(cache_file)
+        self._file = JsonCacheFile(self.cache_file, self.VERSION)
+        if parsers is None:
+            parsers = [JUnitXmlParser(), JestJsonParser(), PytestJsonParser()]
+        self.parsers = list(parsers)
+        self.run_window = run_window
+        self._paths = None
+        self._results = None
+        self.parsed_reports = 0
+        
+    def register(self, parser):
+        """レポート形式のパーサーを追加"""
+        self.parsers.append(parser)
+        self._results = None
+        
+    def _parsers_key(self):
+        return ",".join(parser.name for parser in self.parsers)
+        
+    def _load(self):
+        """キャッシュ読み込み（パーサー構成が変わっていれば破棄）"""
+        self._paths, self._results = {}, {}
+        data = self._file.load(parsers=self._parsers_key())
+        if data is not None and isinstance(data.get("paths"), dict) and isinstance(data.get("results"), dict):
+            self._paths = data["paths"]
+            self._results = data["results"]
+            
+    def _save(self):
+        """キャッシュをアトミックに書き出し"""
+        self._file.save(parsers=self._parsers_key(), paths=self._paths, results=self._results)
+        
+    @staticmethod
+    def _digest(path):
+        """ファイル内容のハッシュ（チャンク単位で読み込み）"""
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+        
+    def _parse(self, path):
+        """対応するパーサーで解析（どれにも該当しなければNone）"""
+        self.parsed_reports += 1
+        for parser in self.parsers:
+            if path.suffix not in parser.suffixes:
+                continue
+            try:
+                result = parser.parse(path)
+            except (OSError, ValueError, UnicodeDecodeError, ET.ParseError):
+                result = None
+            if result is not None:
+                return {**result, "format": parser.name}
+        return None
+        
+    def _format_rank(self, name):
+        """形式の優先順位（parsers の並び順、未登録の形式は最後）"""
+        names = [parser.name for parser in self.parsers]
+        return names.index(name) if name in names else len(names)
+        
+    def ingest(self, report_files):
+        """レポート群を集計（変更のないファイルは再解析しない）"""
+        if self._results is None:
+            self._load()
+        totals = {"passed": 0, "failed": 0, "skipped": 0, "reports": 0}
+        paths = {}
+        runs = {}
+        dirty = False
+        
+        for path in report_files:
+            path = Path(path)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            key = str(path)
+            cached = self._paths.get(key)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                digest = cached[2]
+            else:
+                digest = self._digest(path)
+                dirty = True
+            paths[key] = [stat.st_mtime_ns, stat.st_size, digest]
+            
+            if digest not in self._results:
+                self._results[digest] = self._parse(path)
+                dirty = True
+            result = self._results[digest]
+            if result is not None:
+                runs.setdefault(str(path.parent), []).append((stat.st_mtime, result))
+                
+        for reports in runs.values():
+            newest = max(mtime for mtime, _ in reports)
+            latest = [result for mtime, result in reports if newest - mtime <= self.run_window]
+            primary = min((result["format"] for result in latest), key=self._format_rank)
+            for result in latest:
+                if result["format"] != primary:
+                    continue
+                totals["reports"] += 1
+                for outcome in ("passed", "failed", "skipped"):
+                    totals[outcome] += result[outcome]
+                    
+        if dirty or paths.keys() != self._paths.keys():
+            live = {entry[2] for entry in paths.values()}
+            self._paths = paths
+            self._results = {d: r for d, r in self._results.items() if d in live}
+            self._save()
+        return totals
+
+
+class CoverageAccumulator:
+    """カバレッジ集計（合計・ディレクトリ別・低カバレッジ上位のみ保持してメモリを抑える）
+    
+    同じソースファイルが複数のレポート（Jestの lcov と Cobertura 等）に含まれる場合は
+    最初に読んだレポートの値のみ数える
+    """
+
+    def __init__(self, lowest_limit=5, root=None):
+        self.lowest_limit = lowest_limit
+        self.root = str(root) if root is not None else None
+        self.lines_found = 0
+        self.lines_hit = 0
+        self.files = 0
+        self.directories = {}
+        self._lowest = []
+        self._sources = set()
+        
+    def source_key(self, path):
+        """ソースファイルの同一判定に使うパス（root配下の絶対パスはroot基準の相対パスに揃える）"""
+        path = os.path.normpath(path)
+        if self.root is not None and os.path.isabs(path):
+            try:
+                relative = os.path.relpath(path, self.root)
+            except ValueError:
+                return path
+            if relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+                return relative
+        return path
+        
+    def add_file(self, path, found, hit):
+        """ファイル単位の行カバレッジを追加（集計済みのソースファイルは無視）"""
+        if found <= 0:
+            return
+        path = self.source_key(path)
+        if path in self._sources:
+            return
+        self._sources.add(path)
+        self.lines_found += found
+        self.lines_hit += hit
+        self.files += 1
+        directory = self.directories.setdefault(os.path.dirname(path) or ".", [0, 0])
+        directory[0] += found
+        directory[1] += hit
+        
+        # ヒープの先頭は保持中で最もカバレッジの高いファイル
+        item = (-hit / found, path, found, hit)
+        if len(self._lowest) < self.lowest_limit:
+            heapq.heappush(self._lowest, item)
+        elif item > self._lowest[0]:
+            heapq.heapreplace(self._lowest, item)
+            
+    def add_totals(self, found, hit):
+        """ファイル別情報のないレポートの合計値を追加"""
+        self.lines_found += found
+        self.lines_hit += hit
+        
+    def summary(self):
+        """集計結果"""
+        def pct(found, hit):
+            return hit * 100.0 / found if found else 0.0
+        
+        return {
+            "coverage": pct(self.lines_found, self.lines_hit),
+            "lines_found": self.lines_found,
+            "lines_hit": self.lines_hit,
+            "files": self.files,
+            "lowest_files": [
+                {"file": path, "pct": pct(found, hit), "lines_found": found, "lines_hit": hit}
+                for _, path, found, hit in sorted(self._lowest, reverse=True)
+            ],
+            "directories": {
+                directory: pct(found, hit)
+                for directory, (found, hit) in sorted(self.directories.items())
+            }
+        }
+
+
+class LcovParser:
+    """lcov .info の逐次解析"""
+
+    name = "lcov"
+    suffixes = (".info",)
+
+    def parse(self, path, accumulator):
+        source = None
+        found = hit = 0
+        da_found = da_hit = 0
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.startswith("SF:"):
+                    source = line[3:].strip()
+                    found = hit = da_found = da_hit = 0
+                elif line.startswith("DA:"):
+                    da_found += 1
+                    fields = line[3:].split(",")
+                    if len(fields) > 1 and fields[1].strip() not in ("", "0"):
+                        da_hit += 1
+                elif line.startswith("LF:"):
+                    found = int(line[3:])
+                elif line.startswith("LH:"):
+                    hit = int(line[3:])
+                elif line.startswith("end_of_record") and source is not None:
+                    # LF/LH がなければ DA 行から算出
+                    if not found:
+                        found, hit = da_found, da_hit
+                    accumulator.add_file(source, found, hit)
+                    source = None
+        return True
+
+
+class CoberturaXmlParser:
+    """Cobertura XML（coverage.py xml / JaCoCo変換等）の逐次解析"""
+
+    name = "cobertura"
+    suffixes = (".xml",)
+
+    def parse(self, path, accumulator):
+        pending = None
+        root_checked = False
+        for event, elem in ET.iterparse(path, events=("start", "end")):
+            if not root_checked:
+                if elem.tag != "coverage":
+                    return False
+                root_checked = True
+            if event != "end":
+                continue
+                
+            if elem.tag == "class":
+                lines = elem.find("lines")
+                found = hit = 0
+                if lines is not None:
+                    for line in lines:
+                        found += 1
+                        if line.get("hits", "0") != "0":
+                            hit += 1
+                            
+                # 同一ファイルの連続したclass（内部クラス等）はまとめる
+                filename = elem.get("filename", "")
+                if pending and pending[0] == filename:
+                    pending[1] += found
+                    pending[2] += hit
+                else:
+                    if pending:
+                        accumulator.add_file(*pending)
+                    pending = [filename, found, hit]
+                elem.clear()
+            elif elem.tag == "package":
+                elem.clear()
+                
+        if pending:
+            accumulator.add_file(*pending)
+        return root_checked
+
+
+class CoveragePyJsonParser:
+    """coverage.py の coverage json 出力の解析"""
+
+    name = "coverage.py-json"
+    suffixes = (".json",)
+
+    def parse(self, path, accumulator):
+        current = None
+        counts = {}
+        # ファイルごとの executed_lines 等の行番号配列は読み飛ばす
+        def descend(key_path):
+            return len(key_path) < 3 or key_path[2] == "summary"
+        
+        for key_path, value in JsonEventReader().events(path, max_depth=4, descend=descend):
+            if len(key_path) == 1 and key_path[0] not in ("meta", "files", "totals"):
+                return False
+            if len(key_path) != 4 or key_path[0] != "files" or key_path[2] != "summary":
+                continue
+            if key_path[1] != current:
+                current = key_path[1]
+                counts = {}
+            if key_path[3] in ("covered_lines", "num_statements"):
+                counts[key_path[3]] = value
+                if len(counts) == 2:
+                    accumulator.add_file(current, counts["num_statements"], counts["covered_lines"])
+        return True
+
+
+class IstanbulSummaryParser:
+    """Istanbul/Jest の coverage-summary.json の解析"""
+
+    name = "istanbul-summary"
+    suffixes = (".json",)
+
+    def parse(self, path, accumulator):
+        totals = {}
+        files_added = 0
+        current = None
+        counts = {}
+        first_key = True
+        for key_path, value in JsonEventReader().events(path, max_depth=3):
+            if len(key_path) == 1 and first_key:
+                # Istanbulの要約は "total" から始まる
+                if key_path[0] != "total":
+                    return False
+                first_key = False
+            if len(key_path) != 3 or key_path[1] != "lines" or key_path[2] not in ("total", "covered"):
+                continue
+            if key_path[0] == "total":
+                totals[key_path[2]] = value
+                continue
+            if key_path[0] != current:
+                current = key_path[0]
+                counts = {}
+            counts[key_path[2]] = value
+            if len(counts) == 2:
+                accumulator.add_file(current, counts["total"], counts["covered"])
+                files_added += 1
+                
+        if not files_added and len(totals) == 2:
+            accumulator.add_totals(totals["total"], totals["covered"])
+        return True
+
+
+class CoverageEngine:
+    """カバレッジレポートの集計（lcov / Cobertura / coverage.py JSON / Istanbul summary）
+    
+    Istanbul の coverage-summary.json は lcov と同じ計測の要約のため、
+    他形式のレポートがない場合のみ使用する。複数形式に出力された同じソースファイルは
+    root を基準にパスを揃えて1回だけ数える
+    """
+
+    FALLBACK_PARSERS = ("istanbul-summary",)
+
+    def __init__(self, parsers=None, lowest_limit=5, root=None):
+        if parsers is None:
+            parsers = [LcovParser(), CoberturaXmlParser(), CoveragePyJsonParser(), IstanbulSummaryParser()]
+        self.parsers = list(parsers)
+        self.lowest_limit = lowest_limit
+        self.root = root
+        self._cache_key = None
+        self._cache = None
+        
+    def register(self, parser):
+        """カバレッジ形式のパーサーを追加"""
+        self.parsers.append(parser)
+        self._cache_key = None
+        
+    def collect(self, report_files):
+        """レポート群を集計（いずれのファイルも変更がなければ前回結果を返す）"""
+        stats = []
+        for path in report_files:
+            try:
+                stat = Path(path).stat()
+            except OSError:
+                continue
+            stats.append((str(path), stat.st_mtime_ns, stat.st_size))
+        cache_key = tuple(sorted(stats))
+        if cache_key == self._cache_key:
+            return self._cache
+            
+        accumulator = CoverageAccumulator(self.lowest_limit, self.root)
+        fallback = CoverageAccumulator(self.lowest_limit, self.root)
+        for path, _, _ in cache_key:
+            path = Path(path)
+            for parser in self.parsers:
+                if path.suffix not in parser.suffixes:
+                    continue
+                target = fallback if parser.name in self.FALLBACK_PARSERS else accumulator
+                try:
+                    if parser.parse(path, target):
+                        break
+                except (OSError, ValueError, UnicodeDecodeError, ET.ParseError):
+                    continue
+                    
+        if not accumulator.lines_found:
+            accumulator = fallback
+        self._cache_key = cache_key
+        self._cache = accumulator.summary()
+        return self._cache
+
+
+class MetricsHistory:
+    """ダッシュボード指標の時系列履歴（SQLite、追記専用・保持期間と間引き付き）"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS refreshes (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            phase TEXT NOT NULL,
+            phase_label TEXT NOT NULL,
+            phase_changed INTEGER NOT NULL,
+            total_tests INTEGER NOT NULL,
+            passing_tests INTEGER NOT NULL,
+            failing_tests INTEGER NOT NULL,
+            coverage REAL NOT NULL,
+            subprocess_count INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS refreshes_ts ON refreshes (ts);
+        CREATE TABLE IF NOT EXISTS agent_samples (
+            refresh_id INTEGER NOT NULL REFERENCES refreshes (id) ON DELETE CASCADE,
+            agent TEXT NOT NULL,
+            status TEXT NOT NULL,
+            commit_count INTEGER NOT NULL,
+            files_changed INTEGER NOT NULL,
+            PRIMARY KEY (refresh_id, agent)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS agent_samples_agent ON agent_samples (agent, refresh_id);
+    """
+
+    def __init__(self, db_path, retention_days=90, raw_retention_hours=48,
+                 bucket_seconds=300, compact_interval=3600):
+        self.db_path = Path(db_path)
+        self.retention = retention_days * 86400
+        self.raw_retention = raw_retention_hours * 3600
+        self.bucket_seconds = bucket_seconds
+        self.compact_interval = compact_interval
+        self._conn = None
+        self._last_phase = None
+        self._last_compacted = 0
+        
+    def _connect(self):
+        """接続（初回のみスキーマ作成）"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path))
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(self.SCHEMA)
+            row = self._conn.execute("SELECT phase FROM refreshes ORDER BY id DESC LIMIT 1").fetchone()
+            self._last_phase = row[0] if row else None
+        return self._conn
+        
+    @staticmethod
+    def phase_key(phase_label):
+        """"🔴 RED (…)" → "RED\""""
+        parts = phase_label.split()
+        return parts[1] if len(parts) > 1 else phase_label
+        
+    def record(self, snapshot):
+        """1回の更新結果を追記"""
+        conn = self._connect()
+        phase = self.phase_key(snapshot.phase)
+        stats = snapshot.test_stats
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO refreshes (ts, phase, phase_label, phase_changed, total_tests,"
+                " passing_tests, failing_tests, coverage, subprocess_count)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    snapshot.collected_at.timestamp(),
+                    phase,
+                    snapshot.phase,
+                    int(phase != self._last_phase),
+                    stats["total_tests"],
+                    stats["passing_tests"],
+                    stats["failing_tests"],
+                    stats["coverage"],
+                    snapshot.subprocess_count
+                )
+            )
+            conn.executemany(
+                "INSERT INTO agent_samples (refresh_id, agent, status, commit_count, files_changed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (cursor.lastrowid, agent, activity["current_status"],
+                     activity["commit_count"], activity["files_changed"])
+                    for agent, activity in snapshot.activities.items()
+                ]
+            )
+        self._last_phase = phase
+        
+        if time.monotonic() - self._last_compacted >= self.compact_interval:
+            self.compact()
+            
+    def compact(self, now=None):
+        """保持期間外の削除と古いサンプルの間引き
+        
+        raw_retention より古い行はバケットごとに最後の1行とフェーズ変化点のみ残す
+        """
+        conn = self._connect()
+        if now is None:
+            now = time.time()
+        with conn:
+            conn.execute("DELETE FROM refreshes WHERE ts < ?", (now - self.retention,))
+            conn.execute(
+                "DELETE FROM refreshes WHERE ts < :cutoff AND phase_changed = 0 AND id NOT IN ("
+                " SELECT MAX(id) FROM refreshes WHERE ts < :cutoff"
+                " GROUP BY CAST(ts / :bucket AS INTEGER))",
+                {"cutoff": now - self.raw_retention, "bucket": self.bucket_seconds}
+            )
+        self._last_compacted = time.monotonic()
+        
+    def phase_durations(self, since=None):
+        """フェーズごとの滞在期間 [(フェーズ, 開始, 終了)]（最後のフェーズは終了None）"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT phase, ts FROM refreshes WHERE phase_changed = 1 AND ts >= ? ORDER BY ts",
+            (since or 0,)
+        ).fetchall()
+        return [
+            (phase, start, rows[i + 1][1] if i + 1 < len(rows) else None)
+            for i, (phase, start) in enumerate(rows)
+        ]
+        
+    def agent_last_progress(self):
+        """エージェントごとの最新コミット数と、その値になった時刻"""
+        conn = self._connect()
+        progress = {}
+        agents = [row[0] for row in conn.execute("SELECT DISTINCT agent FROM agent_samples")]
+        for agent in agents:
+            count = conn.execute(
+                "SELECT commit_count FROM agent_samples WHERE agent = ?"
+                " ORDER BY refresh_id DESC LIMIT 1",
+                (agent,)
+            ).fetchone()[0]
+            changed_at = conn.execute(
+                "SELECT MAX(refresh_id) FROM agent_samples WHERE agent = ? AND commit_count != ?",
+                (agent, count)
+            ).fetchone()[0]
+            since = conn.execute(
+                "SELECT MIN(r.ts) FROM agent_samples s JOIN refreshes r ON r.id = s.refresh_id"
+                " WHERE s.agent = ? AND s.refresh_id > ?",
+                (agent, changed_at or 0)
+            ).fetchone()[0]
+            progress[agent] = {"commit_count": count, "since": since}
+        return progress
+        
+    def close(self):
+        """接続を閉じる"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class StatCache:
+    """更新サイクル内で共有するstat結果のキャッシュ"""
+
+    def __init__(self):
+        self._entries = {}
+        self.now = time.time()
+        
+    def reset(self):
+        """新しい更新サイクルを開始（キャッシュ破棄と基準時刻の更新）"""
+        self._entries = {}
+        self.now = time.time()
+        
+    def stat(self, path):
+        """os.stat の結果（存在しなければNone）"""
+        key = str(path)
+        if key not in self._entries:
+            try:
+                self._entries[key] = os.stat(key)
+            except OSError:
+                self._entries[key] = None
+        return self._entries[key]
+        
+    def exists(self, path):
+        return self.stat(path) is not None
+
+
+class EventJournal(WorktreeCache):
+    """各worktreeの sync/events.jsonl（エージェント・gitフックが追記するイベント）の読み取り
+    
+    前回読み終えたバイト位置から追記分だけを読む。読み取り位置と最新のイベントは
+    キャッシュに保存し、再起動後も既読分は読み直さない
+    """
+
+    FILE_NAME = "events.jsonl"
+    # イベントが示すTDDフェーズ（get_tdd_phase の表示と同じ文字列）
+    PHASES = {
+        "test-written": "🔴 RED (テスト作成開始)",
+        "tests-red": "🔴 RED (失敗テスト作成中)",
+        "implement-started": "🟢 GREEN (実装中)",
+        "tests-green": "🟢 GREEN (テスト通過)",
+        "refactor-started": "🔧 REFACTOR (コード改善中)",
+        "review-started": "🔧 REFACTOR (コード改善中)",
+        "integrate-started": "🔗 INTEGRATE (統合・デプロイ中)",
+        "cycle-done": "⏸️ IDLE (待機中)"
+    }
+
+    def __init__(self, stat_cache, cache_file):
+        super().__init__(cache_file)
+        self.stat_cache = stat_cache
+        
+    @staticmethod
+    def parse_event(line):
+        """1行を {"event", "timestamp", "agent", "detail"} に変換（不正な行はNone）"""
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(record, dict) or not isinstance(record.get("event"), str):
+            return None
+        timestamp = record.get("ts")
+        if isinstance(timestamp, str):
+            # ISO 8601 形式も受け付ける（シェルのフックから date -Iseconds で書く場合）
+            try:
+                timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                return None
+        if not isinstance(timestamp, (int, float)):
+            return None
+        return {
+            "event": record["event"],
+            "timestamp": timestamp,
+            "agent": record.get("agent"),
+            "detail": record.get("detail")
+        }
+        
+    def read(self, worktree_path):
+        """追記分を読み込み、{"last_event", "phase_event", "events"} を返す（ジャーナルがなければNone）"""
+        journal = Path(worktree_path) / "sync" / self.FILE_NAME
+        key = str(worktree_path)
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            entry = self._entries.get(key)
+            
+        stat = self.stat_cache.stat(journal)
+        if stat is None:
+            if entry is not None:
+                with self._lock:
+                    self._entries.pop(key, None)
+                    self._dirty = True
+            return None
+            
+        # 作り直し・切り詰められたジャーナルは先頭から読み直す
+        if entry is None or entry["ino"] != stat.st_ino or stat.st_size < entry["offset"]:
+            entry = {"ino": stat.st_ino, "offset": 0, "last_event": None, "phase_event": None, "events": 0}
+        elif stat.st_size == entry["offset"]:
+            return entry
+        else:
+            entry = dict(entry)
+            
+        with open(journal, "rb") as f:
+            f.seek(entry["offset"])
+            data = f.read(stat.st_size - entry["offset"])
+        # 書きかけの最終行は次回に読む
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            event = self.parse_event(line)
+            if event is None:
+                continue
+            entry["events"] += 1
+            entry["last_event"] = event
+            if event["event"] in self.PHASES:
+                entry["phase_event"] = event
+        entry["offset"] += end
+        
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+        return entry
+
+
+class AgentRegistry:
+    """監視対象のエージェントとworktreeの対応
+    
+    .claude/project-config.json の team があればその構成を使い、なければTDDチームの既定構成に
+    agent/<名前> ブランチのworktreeを加える。worktreeの場所は git worktree list --porcelain を
+    1回だけ実行して解決し、設定ファイルと .git/worktrees の更新時刻をキーにキャッシュする
+    """
+
+    DEFAULT_AGENTS = (
+        "test-lead",
+        "backend-developer",
+        "frontend-developer",
+        "review-engineer",
+        "integration-engineer"
+    )
+    VERSION = 1
+
+    def __init__(self, project_path, run, stat_cache, cache_file):
         self.project_path = Path(project_path)
-        self.agents = [
-            "test-lead",
-            "backend-developer", 
-            "frontend-developer",
-            "review-engineer",
-            "integration-engineer"
+        self._run = run
+        self.stat_cache = stat_cache
+        self.cache_file = Path(cache_file)
+        self._file = JsonCacheFile(self.cache_file, self.VERSION)
+        self.config_file = self.project_path / ".claude" / "project-config.json"
+        self.agents = list(self.DEFAULT_AGENTS)
+        self.worktrees = {}
+        self.names = {}
+        self._key = None
+        
+    def _mtime(self, path):
+        stat = self.stat_cache.stat(path) if path is not None else None
+        return stat.st_mtime_ns if stat is not None else None
+        
+    def ensure(self):
+        """未解決なら解決する"""
+        if self._key is None:
+            self.refresh()
+            
+    def refresh(self):
+        """設定ファイルか worktree 構成が変わっていれば解決し直す（変わった場合はTrue）"""
+        location = GitQueryEngine.locate(self.project_path)
+        worktrees_dir = location[1] / "worktrees" if location is not None else None
+        key = [self._mtime(self.config_file), self._mtime(worktrees_dir), location is not None]
+        if key == self._key:
+            return False
+        self._key = key
+        
+        team = self._load_team()
+        listed = None
+        if location is not None and (team is None or any(not entry.get("worktree") for entry in team.values())):
+            listed = self._list_worktrees(key)
+        self._resolve(team, listed or [])
+        return True
+        
+    def _load_team(self):
+        """project-config.json の team（なければNone）"""
+        try:
+            with open(self.config_file, encoding="utf-8") as f:
+                team = json.load(f).get("team")
+        except (OSError, ValueError, AttributeError):
+            return None
+        if not isinstance(team, dict) or not team:
+            return None
+        return {key: entry if isinstance(entry, dict) else {} for key, entry in team.items()}
+        
+    def _list_worktrees(self, key):
+        """git worktree list --porcelain の結果（キーが同じ間はディスクキャッシュを使用）"""
+        data = self._file.load(key=key)
+        if data is not None and isinstance(data.get("worktrees"), list):
+            return data["worktrees"]
+            
+        try:
+            result = self._run(["git", "worktree", "list", "--porcelain"], self.project_path)
+        except subprocess.TimeoutExpired:
+            return []
+        if result.returncode != 0:
+            return []
+        worktrees = []
+        for block in result.stdout.split("\n\n"):
+            entry = {}
+            for line in block.splitlines():
+                field, _, value = line.partition(" ")
+                if field == "worktree":
+                    entry["path"] = value
+                elif field == "branch":
+                    entry["branch"] = value
+            if "path" in entry:
+                worktrees.append(entry)
+                
+        self._file.save(key=key, worktrees=worktrees)
+        return worktrees
+        
+    def _resolve(self, team, listed):
+        """エージェント一覧とworktreeのパスを決定"""
+        by_branch = {
+            entry["branch"][len("refs/heads/agent/"):]: Path(entry["path"])
+            for entry in listed
+            if entry.get("branch", "").startswith("refs/heads/agent/")
+        }
+        by_name = {Path(entry["path"]).name: Path(entry["path"]) for entry in listed}
+        
+        def discover(agent):
+            return (by_branch.get(agent) or by_name.get(f"worktree-{agent}")
+                    or self.project_path.parent / f"worktree-{agent}")
+            
+        self.worktrees = {}
+        self.names = {}
+        if team is not None:
+            self.agents = []
+            for key, entry in team.items():
+                # team のキーは frontend_developer 形式
+                agent = key.replace("_", "-")
+                self.agents.append(agent)
+                if entry.get("name"):
+                    self.names[agent] = entry["name"]
+                if entry.get("worktree"):
+                    self.worktrees[agent] = Path(os.path.normpath(self.project_path / entry["worktree"]))
+                else:
+                    self.worktrees[agent] = discover(agent)
+        else:
+            self.agents = list(self.DEFAULT_AGENTS)
+            self.agents += sorted(agent for agent in by_branch if agent not in self.DEFAULT_AGENTS)
+            for agent in self.agents:
+                self.worktrees[agent] = discover(agent)
+                
+    def worktree(self, agent):
+        """エージェントのworktreeのパス"""
+        return self.worktrees.get(agent) or self.project_path.parent / f"worktree-{agent}"
+
+
+class StageProfiler:
+    """更新処理のステージごとの所要時間を記録するタイミングスパン
+    
+    無効時の span() は共有の空コンテキストを返すだけなので、常時呼び出しても負荷は小さい
+    """
+
+    def __init__(self, enabled=True, max_spans=200000):
+        self.enabled = enabled
+        self.totals = {}
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._null = contextlib.nullcontext()
+        
+    def span(self, name, **args):
+        """with文で囲んだ区間を name のスパンとして記録"""
+        if not self.enabled:
+            return self._null
+        return self._span(name, args)
+        
+    @contextlib.contextmanager
+    def _span(self, name, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start, **args)
+            
+    def record(self, name, start, duration, **args):
+        """計測済みの区間（perf_counter基準の開始時刻と秒数）を記録"""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self._lock:
+            total = self.totals.setdefault(name, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += duration
+            total[2] = max(total[2], duration)
+            self.spans.append((name, thread.ident, thread.name, start, duration, args))
+            
+    def breakdown(self):
+        """ステージ別の集計表（入れ子のスパンは親の時間にも含まれる）"""
+        with self._lock:
+            rows = sorted(self.totals.items(), key=lambda item: item[1][1], reverse=True)
+        lines = [
+            f"{'stage':<24} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}",
+            "-" * 63
         ]
+        for name, (calls, total, longest) in rows:
+            lines.append(
+                f"{name:<24} {calls:>7} {total * 1000:>10.1f} "
+                f"{total * 1000 / calls:>9.2f} {longest * 1000:>9.2f}"
+            )
+        return "\n".join(lines)
+        
+    def write_chrome_trace(self, path):
+        """chrome://tracing / Perfetto で読めるTrace Event形式のJSONを書き出す"""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = []
+        threads = {}
+        for name, tid, thread_name, start, duration, args in spans:
+            threads[tid] = thread_name
+            events.append({
+                "name": name,
+                "ph": "X",
+                "ts": round((start - self._origin) * 1e6, 1),
+                "dur": round(duration * 1e6, 1),
+                "pid": pid,
+                "tid": tid,
+                "args": args
+            })
+        for tid, thread_name in threads.items():
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": thread_name}
+            })
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class AtomicFileWriter:
+    """内容が変わったときだけ一時ファイル+renameでアトミックに書き出す
+    
+    ignore に一致する部分（生成時刻・相対時刻など）は変更判定から除外する
+    """
+
+    def __init__(self, ignore=None):
+        self.ignore = re.compile(ignore, re.MULTILINE) if ignore else None
+        self._written = {}
+        
+    def _digest(self, content):
+        if self.ignore is not None:
+            content = self.ignore.sub("", content)
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+        
+    def write(self, path, content):
+        """書き出した場合はTrue、内容が同じでスキップした場合はFalse"""
+        path = Path(path)
+        digest = self._digest(content)
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+            
+        if mtime_ns is not None:
+            written = self._written.get(path)
+            if written is None or written[1] != mtime_ns:
+                # 初回や外部で更新された場合はファイル内容から判定
+                try:
+                    written = (self._digest(path.read_text(encoding="utf-8")), mtime_ns)
+                except (OSError, UnicodeDecodeError):
+                    written = (None, mtime_ns)
+            if written[0] == digest:
+                self._written[path] = written
+                return False
+                
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_file, path)
+        self._written[path] = (digest, path.stat().st_mtime_ns)
+        return True
+
+
+class TerminalRenderer:
+    """前回のフレームとの差分行だけをANSIカーソル制御で書き換える端末描画
+    
+    フレームが画面に収まらない場合（折り返し・スクロールが起きる場合）は全体を再描画する
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+        self._lines = None
+        self._size = None
+        
+    @staticmethod
+    def display_width(line):
+        """全角文字・絵文字を2桁、結合文字を0桁として表示幅を見積もる"""
+        width = 0
+        for char in line:
+            if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf"):
+                continue
+            width += 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+        return width
+        
+    def render(self, text):
+        """フレームを描画"""
+        if not self.stream.isatty():
+            self.stream.write(text + "\n")
+            self.stream.flush()
+            return
+            
+        size = shutil.get_terminal_size()
+        lines = text.split("\n")
+        fits = len(lines) < size.lines and all(
+            self.display_width(line) < size.columns for line in lines
+        )
+        if self._lines is None or size != self._size or not fits:
+            output = ["\x1b[H\x1b[2J", text, "\n"]
+        else:
+            output = [
+                f"\x1b[{row + 1};1H{line}\x1b[K"
+                for row, line in enumerate(lines)
+                if row >= len(self._lines) or self._lines[row] != line
+            ]
+            if len(lines) < len(self._lines):
+                output.append(f"\x1b[{len(lines) + 1};1H\x1b[J")
+            output.append(f"\x1b[{len(lines) + 1};1H")
+        self._lines = lines if fits else None
+        self._size = size
+        self.stream.write("".join(output))
+        self.stream.flush()
+        
+    def reset(self):
+        """次回は全体を再描画する"""
+        self._lines = None
+
+
+class ProjectNames:
+    """配信名・メトリクスの project ラベルに使うプロジェクト名の割り当て
+    
+    ディレクトリ名を使い、別のパスと重複した場合は連番を付ける。同じパスには同じ名前を返す
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._lock = threading.Lock()
+        
+    def assign(self, project_path):
+        """プロジェクトの名前（初回に割り当て）"""
+        path = Path(project_path).resolve()
+        with self._lock:
+            if path in self._names:
+                return self._names[path]
+            base = path.name or "project"
+            taken = set(self._names.values())
+            name = base
+            index = 2
+            while name in taken:
+                name = f"{base}-{index}"
+                index += 1
+            self._names[path] = name
+        return name
+
+
+class MetricsExporter:
+    """監視指標のOpenMetrics / Prometheusテキスト形式での出力
+    
+    スクレイプ時には収集を行わず、最後に公開されたスナップショットから出力する
+    """
+
+    PHASES = ("RED", "GREEN", "REFACTOR", "INTEGRATE", "IDLE")
+    STATUSES = ("active", "idle", "inactive", "unknown")
+    DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, textfile=None, names=None):
+        self.textfile = Path(textfile) if textfile else None
+        self.names = names if names is not None else ProjectNames()
+        self._projects = {}
+        self._lock = threading.Lock()
+        
+    def update(self, project, snapshot):
+        """スナップショットを反映し、カウンタとヒストグラムを更新"""
+        with self._lock:
+            state = self._projects.setdefault(project, {
+                "snapshot": None,
+                "refreshes": 0,
+                "subprocesses": 0,
+                "buckets": [0] * len(self.DURATION_BUCKETS),
+                "duration_sum": 0.0
+            })
+            state["snapshot"] = snapshot
+            state["refreshes"] += 1
+            state["subprocesses"] += snapshot.subprocess_count
+            state["duration_sum"] += snapshot.duration
+            for index, bound in enumerate(self.DURATION_BUCKETS):
+                if snapshot.duration <= bound:
+                    state["buckets"][index] += 1
+                    
+        if self.textfile is not None:
+            self.write_textfile()
+            
+    @staticmethod
+    def _labels(**labels):
+        def escape(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+        
+    def render(self, openmetrics=True):
+        """全プロジェクトの指標をテキスト形式で出力"""
+        families = []
+        
+        def family(name, metric_type, help_text, samples):
+            families.append((name, metric_type, help_text, samples))
+            
+        with self._lock:
+            projects = [(name, dict(state)) for name, state in sorted(self._projects.items())]
+            
+        def gauge_per_project(name, help_text, value):
+            family(name, "gauge", help_text, [
+                ("", self._labels(project=project), value(state["snapshot"]))
+                for project, state in projects
+            ])
+            
+        def gauge_per_agent(name, help_text, value):
+            family(name, "gauge", help_text, [
+                ("", self._labels(project=project, agent=agent), value(activity))
+                for project, state in projects
+                for agent, activity in state["snapshot"].activities.items()
+            ])
+            
+        family("tdd_phase", "gauge", "Current TDD phase (1 for the active phase)", [
+            ("", self._labels(project=project, phase=phase),
+             int(MetricsHistory.phase_key(state["snapshot"].phase) == phase))
+            for project, state in projects
+            for phase in self.PHASES
+        ])
+        gauge_per_project("tdd_test_files", "Number of test files under output/tests",
+                          lambda s: s.test_stats["total_tests"])
+        gauge_per_project("tdd_tests_passing", "Passing tests in ingested reports",
+                          lambda s: s.test_stats["passing_tests"])
+        gauge_per_project("tdd_tests_failing", "Failing tests in ingested reports",
+                          lambda s: s.test_stats["failing_tests"])
+        gauge_per_project("tdd_coverage_ratio", "Line coverage ratio",
+                          lambda s: s.test_stats["coverage"] / 100.0)
+        gauge_per_agent("tdd_agent_commits", "Commits reachable from the agent worktree HEAD",
+                        lambda a: a["commit_count"])
+        gauge_per_agent("tdd_agent_files_changed", "Files changed in the agent worktree",
+                        lambda a: a["files_changed"])
+        family("tdd_agent_worktree_files", "gauge", "Changed files in the agent worktree by state", [
+            ("", self._labels(project=project, agent=agent, state=state_name),
+             activity[f"files_{state_name}"])
+            for project, state in projects
+            for agent, activity in state["snapshot"].activities.items()
+            for state_name in ("staged", "unstaged", "untracked")
+        ])
+        gauge_per_agent("tdd_agent_last_commit_timestamp_seconds", "Committer time of the agent HEAD",
+                        lambda a: a["last_commit"]["timestamp"] if a["last_commit"] else 0)
+        family("tdd_agent_churn_lines", "gauge", "Lines added and deleted by the agent", [
+            ("", self._labels(project=project, agent=agent, scope=scope, change=change),
+             (activity["churn"][scope][change] if activity["churn"] and activity["churn"][scope] else 0))
+            for project, state in projects
+            for agent, activity in state["snapshot"].activities.items()
+            for scope in ("last_commit", "window")
+            for change in ("added", "deleted")
+        ])
+        family("tdd_agent_status", "gauge", "Agent activity status (1 for the current status)", [
+            ("", self._labels(project=project, agent=agent, status=status),
+             int(activity["current_status"] == status))
+            for project, state in projects
+            for agent, activity in state["snapshot"].activities.items()
+            for status in self.STATUSES
+        ])
+        gauge_per_project("tdd_monitor_last_refresh_timestamp_seconds", "Time of the last refresh",
+                          lambda s: s.collected_at.timestamp())
+        family("tdd_monitor_refreshes", "counter", "Dashboard refreshes", [
+            ("_total", self._labels(project=project), state["refreshes"])
+            for project, state in projects
+        ])
+        family("tdd_monitor_subprocesses", "counter", "Subprocesses spawned by refreshes", [
+            ("_total", self._labels(project=project), state["subprocesses"])
+            for project, state in projects
+        ])
+        
+        histogram = []
+        for project, state in projects:
+            for bound, count in zip(self.DURATION_BUCKETS, state["buckets"]):
+                histogram.append(("_bucket", self._labels(project=project, le=bound), count))
+            histogram.append(("_bucket", self._labels(project=project, le="+Inf"), state["refreshes"]))
+            histogram.append(("_count", self._labels(project=project), state["refreshes"]))
+            histogram.append(("_sum", self._labels(project=project), state["duration_sum"]))
+        family("tdd_monitor_collection_duration_seconds", "histogram",
+               "Time spent collecting one snapshot", histogram)
+        
+        lines = []
+        for name, metric_type, help_text, samples in families:
+            # Prometheusテキスト形式ではcounterのTYPE行に _total を含める
+            type_name = name + "_total" if metric_type == "counter" and not openmetrics else name
+            lines.append(f"# HELP {type_name} {help_text}")
+            lines.append(f"# TYPE {type_name} {metric_type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{labels} {value}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+        
+    def write_textfile(self):
+        """node_exporter textfile collector 用ファイルをアトミックに書き出し"""
+        self.textfile.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.textfile.with_name(f".{self.textfile.name}.{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(self.render(openmetrics=False))
+        os.replace(tmp_file, self.textfile)
+
+
+class DashboardRequestHandler(BaseHTTPRequestHandler):
+    """ダッシュボード配信用のリクエストハンドラ"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+        
+    def _send(self, status, body=b"", content_type="text/plain; charset=utf-8", etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+            
+    def do_HEAD(self):
+        self.do_GET()
+        
+    def do_GET(self):
+        dashboard = self.server.dashboard
+        url = urllib.parse.urlsplit(self.path)
+        name = urllib.parse.parse_qs(url.query).get("project", [None])[0]
+        
+        if url.path == "/projects.json":
+            body = json.dumps(dashboard.project_names()).encode()
+            return self._send(200, body, "application/json")
+        if url.path == "/metrics":
+            return self._send_metrics(dashboard.metrics)
+            
+        routes = {
+            "/": "html",
+            "/dashboard.html": "html",
+            "/dashboard.json": "json",
+            "/dashboard.md": "markdown",
+            "/events": "events"
+        }
+        kind = routes.get(url.path)
+        if kind is None:
+            return self._send(404, b"not found\n")
+        state = dashboard.state(name)
+        if state is None:
+            return self._send(404 if name else 503, b"no snapshot yet\n")
+        if kind == "events":
+            return self._stream_events(dashboard, state["name"])
+            
+        # 内容が変わっていなければ本文を返さない
+        etag = state["etag"]
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            return self._send(304, etag=etag)
+        content_types = {
+            "html": "text/html; charset=utf-8",
+            "json": "application/json",
+            "markdown": "text/markdown; charset=utf-8"
+        }
+        self._send(200, state[kind], content_types[kind], etag)
+        
+    def _send_metrics(self, metrics):
+        """Acceptヘッダーに応じてOpenMetrics / Prometheusテキスト形式で指標を返す"""
+        if metrics is None:
+            return self._send(404, b"metrics disabled\n")
+        if "application/openmetrics-text" in self.headers.get("Accept", ""):
+            body = metrics.render(openmetrics=True)
+            content_type = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+        else:
+            body = metrics.render(openmetrics=False)
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        self._send(200, body.encode(), content_type)
+        
+    def _stream_events(self, dashboard, name):
+        """Server-Sent Events でスナップショット更新をプッシュ"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "keep-alive")
+        self.end_headers()
+        self.close_connection = True
+        
+        last_etag = None
+        try:
+            while not dashboard.closed:
+                state = dashboard.wait_for_change(name, last_etag, timeout=DashboardServer.HEARTBEAT)
+                if state is None or state["etag"] == last_etag:
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    last_etag = state["etag"]
+                    self.wfile.write(
+                        f"event: snapshot\nid: {last_etag}\ndata: ".encode()
+                        + state["json_compact"] + b"\n\n"
+                    )
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class DashboardServer:
+    """最新スナップショットをHTTPで配信（JSON / Markdown / HTML / Server-Sent Events）"""
+
+    HEARTBEAT = 15
+    HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="ja">
+<head><meta charset="utf-8"><title>TDD Progress Dashboard - {name}</title></head>
+<body>
+<pre id="dashboard">{markdown}</pre>
+<script>
+const events = new EventSource("events?project={query}");
+events.addEventListener("snapshot", async () => {{
+  const response = await fetch("dashboard.md?project={query}");
+  document.getElementById("dashboard").textContent = await response.text();
+}});
+</script>
+</body>
+</html>
+"""
+
+    def __init__(self, host="127.0.0.1", port=8765, names=None):
+        self.names = names if names is not None else ProjectNames()
+        self._projects = {}
+        self._condition = threading.Condition()
+        self.closed = False
+        self.httpd = ThreadingHTTPServer((host, port), DashboardRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.dashboard = self
+        self.metrics = None
+        self._thread = None
+        
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+        
+    def start(self):
+        """バックグラウンドスレッドで配信開始"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="tdd-dashboard-http", daemon=True)
+        self._thread.start()
+        
+    def unique_name(self, project_path):
+        """プロジェクトの配信名（ProjectNames で割り当て、最初の公開までは一覧に出さない）"""
+        name = self.names.assign(project_path)
+        with self._condition:
+            self._projects.setdefault(name, None)
+        return name
+        
+    def project_names(self):
+        with self._condition:
+            return [name for name, state in self._projects.items() if state is not None]
+            
+    def state(self, name=None):
+        """配信中の状態（name省略時は最初のプロジェクト）"""
+        with self._condition:
+            if name is None:
+                name = next((n for n, s in self._projects.items() if s is not None), None)
+            return self._projects.get(name) if name is not None else None
+            
+    def publish(self, name, snapshot, dashboard):
+        """新しいスナップショットを配信対象に設定"""
+        payload = snapshot.to_dict()
+        payload["project"] = name
+        
+        # ETagは収集時刻と監視自体のコスト（subprocess_count）を除いた内容から算出（変化がなければ304を返せる）
+        stable = {key: value for key, value in payload.items() if key not in ("collected_at", "subprocess_count")}
+        digest = hashlib.sha1(json.dumps(stable, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+        query = urllib.parse.quote(name)
+        state = {
+            "name": name,
+            "etag": f'W/"{digest[:20]}"',
+            "json": json.dumps(payload, ensure_ascii=False, indent=2).encode(),
+            "json_compact": json.dumps(payload, ensure_ascii=False).encode(),
+            "markdown": dashboard.encode(),
+            "html": self.HTML_TEMPLATE.format(
+                name=html.escape(name),
+                markdown=html.escape(dashboard),
+                query=query
+            ).encode()
+        }
+        with self._condition:
+            self._projects[name] = state
+            self._condition.notify_all()
+            
+    def wait_for_change(self, name, etag, timeout):
+        """ETagが変わるまで待機（タイムアウト時は現在の状態を返す）"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.closed or (self._projects.get(name) or {}).get("etag") != etag,
+                timeout=timeout
+            )
+            return self._projects.get(name)
+            
+    def close(self):
+        """配信を停止"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class DashboardSnapshot:
+    """1回の更新で収集したモニタリングデータのスナップショット"""
+
+    def __init__(self, test_stats, activities, subprocess_count=0):
+        self.collected_at = datetime.now()
+        self.test_stats = test_stats
+        self.activities = activities
+        self.subprocess_count = subprocess_count
+        self.phase = None
+        self.timeline = []
+        self.duration = 0.0
+        
+    def to_dict(self):
+        """JSON配信用の辞書"""
+        return {
+            "collected_at": self.collected_at.isoformat(timespec="seconds"),
+            "phase": self.phase,
+            "test_stats": self.test_stats,
+            "activities": self.activities,
+            "timeline": self.timeline,
+            "subprocess_count": self.subprocess_count
+        }
+
+
+class TDDProgressMonitor:
+    # フェーズ判定に使う役割ごとのエージェント（TDDチームと開発チーム）
+    PHASE_ROLES = {
+        "test": ("test-lead", "test-engineer"),
+        "implement": ("backend-developer", "frontend-developer"),
+        "review": ("review-engineer",),
+        "integrate": ("integration-engineer", "devops-engineer")
+    }
+
+    def __init__(self, project_path, parallelism=4, probe_timeout=10.0, history=True,
+                 history_retention_days=90, timeline_size=5, active_threshold=300,
+                 idle_threshold=3600, churn_window=86400, git=None, stat_cache=None, executor=None,
+                 profiler=None):
+        self.project_path = Path(project_path)
+        self.profiler = profiler if profiler is not None else StageProfiler(enabled=False)
+        self.subprocess_count = 0
+        self._count_lock = threading.Lock()
+        # git・スレッドプール・statキャッシュは複数プロジェクト監視時に共有できる
+        self._owns_git = git is None
+        self.git = git if git is not None else GitQueryEngine(self._spawn, probe_timeout)
+        self.parallelism = max(1, parallelism)
+        self.probe_timeout = probe_timeout
+        self._owns_executor = executor is None
+        self._executor = executor
+        self.test_index = TestFileIndex(
+            self.project_path / "output" / "tests",
+            self.project_path / "sync" / ".monitor-cache" / "test-index.json"
+        )
+        self.test_results = TestResultIngestor(
+            self.project_path / "sync" / ".monitor-cache" / "test-results.json"
+        )
+        self.coverage = CoverageEngine(root=self.project_path.resolve())
+        self.worktree_status = WorktreeStatus(self._run)
+        self.churn = ChurnTracker(
+            self._run,
+            self.project_path / "sync" / ".monitor-cache" / "churn.json",
+            window=churn_window
+        )
+        self.commit_counts = CommitCountCache(
+            self.project_path / "sync" / ".monitor-cache" / "commit-counts.json",
+            self._run
+        )
+        self.timeline_size = timeline_size
+        self.active_threshold = active_threshold
+        self.idle_threshold = idle_threshold
+        self.stat_cache = stat_cache if stat_cache is not None else StatCache()
+        self.registry = AgentRegistry(
+            self.project_path,
+            self._run,
+            self.stat_cache,
+            self.project_path / "sync" / ".monitor-cache" / "worktrees.json"
+        )
+        self.events = EventJournal(
+            self.stat_cache,
+            self.project_path / "sync" / ".monitor-cache" / "events.json"
+        )
+        self.server = None
+        self.server_name = None
+        self.metrics = None
+        self.metrics_name = None
+        self.renderer = TerminalRenderer()
+        self.writer = AtomicFileWriter(rf"^Generated: .*$|{RELATIVE_TIME_PATTERN}")
+        self.history = None
+        if history:
+            self.history = MetricsHistory(
+                self.project_path / "sync" / ".monitor-cache" / "history.sqlite3",
+                retention_days=history_retention_days
+            )
+        
+    @property
+    def agents(self):
+        """監視対象のエージェント一覧"""
+        self.registry.ensure()
+        return self.registry.agents
+        
+    def worktree_path(self, agent):
+        """エージェントのworktreeのパス"""
+        self.registry.ensure()
+        return self.registry.worktree(agent)
+        
+    def _spawn(self, cmd):
+        """常駐サブプロセス起動（呼び出し回数を記録）"""
+        with self._count_lock:
+            self.subprocess_count += 1
+        return subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        
+    def close(self):
+        """常駐プロセスとスレッドプールを終了"""
+        if self.history is not None:
+            self.history.close()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._owns_git:
+            self.git.close()
+        
+    def _run(self, cmd, cwd):
+        """サブプロセス実行（呼び出し回数を記録）"""
+        with self._count_lock:
+            self.subprocess_count += 1
+        with self.profiler.span("subprocess", cmd=" ".join(cmd[:3])):
+            return subprocess.run(
+                cmd,
+                cwd=cwd,
+                capture_output=True,
+                text=True,
+                timeout=self.probe_timeout
+            )
+        
+    def collect_snapshot(self, previous=None, changed=None):
+        """全エージェントの活動とテスト統計を1回だけ収集
+        
+        previous と changed を渡すと、変更のあったセクションのみ再計算する
+        """
+        self.stat_cache.reset()
+        started = time.perf_counter()
+        start_count = self.subprocess_count
+        if previous is None or changed is None:
+            # worktreeの追加・削除やチーム構成の変更を反映
+            self.registry.refresh()
+            with self.profiler.span("test_statistics"):
+                test_stats = self.get_test_statistics()
+            with self.profiler.span("activities"):
+                activities = self.collect_activities()
+        else:
+            if "tests" in changed:
+                with self.profiler.span("test_statistics"):
+                    test_stats = self.get_test_statistics()
+            else:
+                test_stats = previous.test_stats
+            activities = dict(previous.activities)
+            with self.profiler.span("activities"):
+                activities.update(self.collect_activities([a for a in self.agents if a in changed]))
+        self.commit_counts.save()
+        self.churn.save()
+        self.events.save()
+        snapshot = DashboardSnapshot(
+            test_stats,
+            activities,
+            subprocess_count=self.subprocess_count - start_count
+        )
+        if previous is not None and changed is not None and not set(changed) & set(self.agents):
+            snapshot.timeline = previous.timeline
+        else:
+            with self.profiler.span("timeline"):
+                snapshot.timeline = self.get_timeline()
+        with self.profiler.span("tdd_phase"):
+            snapshot.phase = self.get_tdd_phase(snapshot)
+        snapshot.duration = time.perf_counter() - started
+        self.profiler.record("collect_snapshot", started, snapshot.duration)
+        return snapshot
+        
+    def collect_activities(self, agents=None):
+        """エージェントの活動状況を並列に収集"""
+        if agents is None:
+            agents = self.agents
+        if self.parallelism <= 1 or len(agents) <= 1:
+            return {agent: self.get_agent_activity(agent) for agent in agents}
+            
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.parallelism,
+                thread_name_prefix="tdd-probe"
+            )
+        futures = {
+            agent: self._executor.submit(self.get_agent_activity, agent)
+            for agent in agents
+        }
+        
+        # 待ち行列分も含めた上限時間。超過したエージェントは unknown 扱い
+        rounds = math.ceil(len(agents) / self.parallelism)
+        done, _ = wait(futures.values(), timeout=self.probe_timeout * rounds)
+        
+        activities = {}
+        for agent, future in futures.items():
+            if future in done and future.exception() is None:
+                activities[agent] = future.result()
+            else:
+                future.cancel()
+                activities[agent] = self._new_activity("unknown")
+        return activities
+        
+    def _agent_log(self, agent):
+        """エージェントworktreeのコミット列（新しい順）"""
+        worktree_path = self.worktree_path(agent)
+        for commit in self.git.iter_log(worktree_path):
+            yield commit["committer_time"], agent, commit
+            
+    def get_timeline(self, limit=None):
+        """全worktreeの直近コミットをコミット日時順にマージ
+        
+        各worktreeのコミット列は新しい順に遅延読み込みされるため、
+        k-wayマージで読むのは各worktreeから高々limit件
+        """
+        if limit is None:
+            limit = self.timeline_size
+        merged = heapq.merge(
+            *(self._agent_log(agent) for agent in self.agents),
+            key=lambda item: item[0],
+            reverse=True
+        )
+        
+        timeline = []
+        seen = set()
+        try:
+            for timestamp, agent, commit in merged:
+                # 共通の祖先コミットは最初に見つかったエージェントにのみ表示
+                if commit["sha"] in seen:
+                    continue
+                seen.add(commit["sha"])
+                timeline.append({
+                    "agent": agent,
+                    "hash": commit["sha"][:7],
+                    "message": commit["subject"],
+                    "timestamp": timestamp
+                })
+                if len(timeline) >= limit:
+                    break
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            pass
+        return timeline
         
     def get_test_statistics(self):
         """テスト統計情報を取得"""
@@ -29,172 +2988,266 @@ class TDDProgressMonitor:
             "total_tests": 0,
             "passing_tests": 0,
             "failing_tests": 0,
-            "coverage": 0.0
+            "coverage": 0.0,
+            "coverage_lowest_files": [],
+            "coverage_by_directory": {}
         }
         
-        # テストファイルをカウント
-        test_dir = self.project_path / "output" / "tests"
-        if test_dir.exists():
-            test_files = list(test_dir.glob("**/*.test.*")) + list(test_dir.glob("**/*_test.*"))
-            stats["total_tests"] = len(test_files)
+        # テストファイルをカウント（索引から差分更新）
+        with self.profiler.span("test_index"):
+            stats["total_tests"] = self.test_index.count()
+        
+        # テスト結果レポート（JUnit XML / Jest JSON / pytest JSON）から成否を集計
+        with self.profiler.span("test_results"):
+            results = self.test_results.ingest(self.test_index.report_files() + self._coverage_report_files())
+        stats["passing_tests"] = results["passed"]
+        stats["failing_tests"] = results["failed"]
             
-        # カバレッジレポートを読む
-        coverage_file = self.project_path / "coverage" / "coverage-summary.json"
-        if coverage_file.exists():
-            try:
-                with open(coverage_file) as f:
-                    coverage_data = json.load(f)
-                    stats["coverage"] = coverage_data.get("total", {}).get("lines", {}).get("pct", 0)
-            except:
-                pass
+        # カバレッジレポートを逐次解析
+        with self.profiler.span("coverage"):
+            coverage = self.coverage.collect(self._coverage_files())
+        stats["coverage"] = coverage["coverage"]
+        stats["coverage_lowest_files"] = coverage["lowest_files"]
+        stats["coverage_by_directory"] = coverage["directories"]
                 
         return stats
         
-    def get_agent_activity(self, agent):
-        """エージェントの活動状況を取得"""
-        worktree_path = self.project_path.parent / f"worktree-{agent}"
-        activity = {
+    def _coverage_report_files(self):
+        """coverage/ 直下のレポート候補"""
+        coverage_dir = self.project_path / "coverage"
+        if not coverage_dir.is_dir():
+            return []
+        with os.scandir(coverage_dir) as entries:
+            return [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and entry.name.endswith(TestFileIndex.REPORT_SUFFIXES)
+            ]
+            
+    def _coverage_files(self):
+        """カバレッジレポート候補（coverage/ 直下とプロジェクト直下の定番ファイル）"""
+        candidates = [
+            path for path in self._coverage_report_files()
+            if path.suffix in (".xml", ".json")
+        ]
+        coverage_dir = self.project_path / "coverage"
+        if coverage_dir.is_dir():
+            candidates += sorted(coverage_dir.glob("*.info"))
+        for name in ("lcov.info", "coverage.xml", "coverage.json"):
+            path = self.project_path / name
+            if path.is_file():
+                candidates.append(path)
+        return candidates
+        
+    @staticmethod
+    def _new_activity(status="inactive"):
+        """活動状況の初期値"""
+        return {
             "last_commit": None,
             "commit_count": 0,
-            "current_status": "inactive",
-            "files_changed": 0
+            "current_status": status,
+            "files_changed": 0,
+            "files_staged": 0,
+            "files_unstaged": 0,
+            "files_untracked": 0,
+            "churn": None,
+            "last_event": None,
+            "phase_event": None
         }
         
-        if worktree_path.exists():
-            try:
-                # 最新コミット取得
-                result = subprocess.run(
-                    ["git", "log", "-1", "--format=%h|%s|%ar"],
-                    cwd=worktree_path,
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode == 0 and result.stdout.strip():
-                    parts = result.stdout.strip().split("|")
-                    activity["last_commit"] = {
-                        "hash": parts[0],
-                        "message": parts[1],
-                        "time": parts[2]
-                    }
-                
-                # コミット数
-                result = subprocess.run(
-                    ["git", "rev-list", "--count", "HEAD"],
-                    cwd=worktree_path,
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode == 0:
-                    activity["commit_count"] = int(result.stdout.strip())
+    def classify_activity(self, mtime, now=None):
+        """ステータスファイルの更新からの経過秒数で活動状況を分類"""
+        if now is None:
+            now = self.stat_cache.now
+        age = now - mtime
+        if age < self.active_threshold:
+            return "active"
+        if age < self.idle_threshold:
+            return "idle"
+        return "inactive"
+        
+    def get_agent_activity(self, agent):
+        """エージェントの活動状況を取得"""
+        with self.profiler.span("agent_activity", agent=agent):
+            worktree_path = self.worktree_path(agent)
+            activity = self._new_activity()
+        
+            if self.stat_cache.exists(worktree_path):
+                try:
+                    # 最新コミットとコミット数（共有.gitから一括取得）
+                    with self.profiler.span("git_head", agent=agent):
+                        head = self.git.head_summary(worktree_path, self.commit_counts)
+                    if head is not None:
+                        commit = head["commit"]
+                        activity["last_commit"] = {
+                            "hash": commit["sha"][:7],
+                            "message": commit["subject"],
+                            "timestamp": commit["committer_time"]
+                        }
+                        activity["commit_count"] = head["commit_count"]
+                        
+                        # 追加・削除行数（HEADが変わったときだけ差分を読む）
+                        with self.profiler.span("churn", agent=agent):
+                            activity["churn"] = self.churn.update(worktree_path, commit["sha"], self.stat_cache.now)
                 
-                # 変更ファイル数
-                result = subprocess.run(
-                    ["git", "diff", "--name-only"],
-                    cwd=worktree_path,
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode == 0:
-                    files = result.stdout.strip().split("\n")
-                    activity["files_changed"] = len([f for f in files if f])
+                    # 変更ファイル数（index.lockを取らず、statが変わっていなければgitを実行しない）
+                    with self.profiler.span("worktree_status", agent=agent):
+                        changes = self.worktree_status.changes(
+                            worktree_path,
+                            head["commit"]["sha"] if head is not None else None
+                        )
+                    if changes is not None:
+                        activity.update(changes)
                     
-                # ステータスファイル確認
-                status_file = worktree_path / "sync" / "status.md"
-                if status_file.exists():
-                    # ファイルの更新時刻で活動状況判断
-                    mtime = datetime.fromtimestamp(status_file.stat().st_mtime)
-                    if (datetime.now() - mtime).seconds < 300:  # 5分以内
-                        activity["current_status"] = "active"
-                    elif (datetime.now() - mtime).seconds < 3600:  # 1時間以内
-                        activity["current_status"] = "idle"
+                    # ステータスファイル確認
+                    status_stat = self.stat_cache.stat(worktree_path / "sync" / "status.md")
+                    last_seen = status_stat.st_mtime if status_stat is not None else None
+                    
+                    # イベントジャーナル（追記分のみ読む）
+                    with self.profiler.span("events", agent=agent):
+                        journal = self.events.read(worktree_path)
+                    if journal is not None and journal["last_event"] is not None:
+                        activity["last_event"] = journal["last_event"]
+                        activity["phase_event"] = journal["phase_event"]
+                        last_seen = max(last_seen or 0, journal["last_event"]["timestamp"])
+                        
+                    if last_seen is not None:
+                        # status.md の更新時刻と最新イベントで活動状況判断（更新サイクル共通の基準時刻を使用）
+                        activity["current_status"] = self.classify_activity(last_seen)
                         
-            except Exception as e:
-                pass
+                except subprocess.TimeoutExpired:
+                    # 応答しないworktreeはダッシュボード全体を止めずに unknown 扱い
+                    activity["current_status"] = "unknown"
+                except Exception as e:
+                    pass
                 
         return activity
         
-    def get_tdd_phase(self):
-        """現在のTDDフェーズを判定"""
-        test_stats = self.get_test_statistics()
+    def latest_phase_event(self, snapshot):
+        """全エージェントのジャーナルで最も新しいフェーズイベント（なければNone）
+        
+        idle_threshold より古いイベントは現在の状況を表さないため使わない
+        """
+        since = snapshot.collected_at.timestamp() - self.idle_threshold
+        events = [
+            dict(activity["phase_event"], agent=activity["phase_event"]["agent"] or agent)
+            for agent, activity in snapshot.activities.items()
+            if activity.get("phase_event") and activity["phase_event"]["timestamp"] >= since
+        ]
+        return max(events, key=lambda event: event["timestamp"]) if events else None
+        
+    def get_tdd_phase(self, snapshot=None):
+        """現在のTDDフェーズを判定（直近のフェーズイベントがあればそれに従う）"""
+        if snapshot is None:
+            return self.collect_snapshot().phase
+        test_stats = snapshot.test_stats
+        
+        # 各エージェントの活動確認（チームにいない役割は非アクティブ扱い）
+        activities = snapshot.activities
+        event = self.latest_phase_event(snapshot)
+        if event is not None:
+            return EventJournal.PHASES[event["event"]]
         
-        # 各エージェントの活動確認
-        activities = {agent: self.get_agent_activity(agent) for agent in self.agents}
+        def active(role):
+            return any(
+                activities.get(agent, {}).get("current_status") == "active"
+                for agent in self.PHASE_ROLES[role]
+            )
         
         # フェーズ判定ロジック
-        if activities["test-lead"]["current_status"] == "active":
+        if active("test"):
             if test_stats["total_tests"] == 0:
                 return "🔴 RED (テスト作成開始)"
             elif test_stats["failing_tests"] > 0:
                 return "🔴 RED (失敗テスト作成中)"
         
-        if (activities["backend-developer"]["current_status"] == "active" or 
-            activities["frontend-developer"]["current_status"] == "active"):
+        if active("implement"):
             if test_stats["failing_tests"] > 0:
                 return "🟢 GREEN (実装中)"
             else:
                 return "🟢 GREEN (テスト通過)"
                 
-        if activities["review-engineer"]["current_status"] == "active":
+        if active("review"):
             return "🔧 REFACTOR (コード改善中)"
             
-        if activities["integration-engineer"]["current_status"] == "active":
+        if active("integrate"):
             return "🔗 INTEGRATE (統合・デプロイ中)"
             
         return "⏸️ IDLE (待機中)"
         
-    def generate_dashboard(self):
+    def _phase_source(self, snapshot, now):
+        """フェーズ判定の根拠となったイベントの表示行"""
+        event = self.latest_phase_event(snapshot)
+        if event is None:
+            return ""
+        return f"- Event: {event['event']} by {event['agent']} ({format_relative_time(event['timestamp'], now)})\n"
+        
+    def generate_dashboard(self, snapshot=None):
         """ダッシュボード生成"""
-        test_stats = self.get_test_statistics()
-        current_phase = self.get_tdd_phase()
+        if snapshot is None:
+            snapshot = self.collect_snapshot()
+        started = time.perf_counter()
+        test_stats = snapshot.test_stats
+        current_phase = snapshot.phase
+        now = time.time()
         
         dashboard = f"""# TDD Progress Dashboard
 Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 ## 📊 Current Phase
 **{current_phase}**
-
+{self._phase_source(snapshot, now)}
 ## 🧪 Test Statistics
 - Total Tests: {test_stats['total_tests']}
 - Passing: {test_stats['passing_tests']}
 - Failing: {test_stats['failing_tests']}
 - Coverage: {test_stats['coverage']:.1f}%
-
-## 🤖 Agent Activity
 """
         
-        for agent in self.agents:
-            activity = self.get_agent_activity(agent)
+        if test_stats["coverage_lowest_files"]:
+            dashboard += "\n### 📉 Lowest Coverage\n"
+            for entry in test_stats["coverage_lowest_files"]:
+                dashboard += f"- {entry['file']}: {entry['pct']:.1f}% ({entry['lines_hit']}/{entry['lines_found']})\n"
+                
+        dashboard += "\n## 🤖 Agent Activity\n"
+        
+        for agent, activity in snapshot.activities.items():
             status_icon = {
                 "active": "🟢",
                 "idle": "🟡",
-                "inactive": "⚫"
+                "inactive": "⚫",
+                "unknown": "❔"
             }.get(activity["current_status"], "⚫")
             
-            dashboard += f"\n### {status_icon} {agent.replace('-', ' ').title()}\n"
+            name = self.registry.names.get(agent) or agent.replace('-', ' ').title()
+            dashboard += f"\n### {status_icon} {name}\n"
             dashboard += f"- Status: {activity['current_status']}\n"
             dashboard += f"- Commits: {activity['commit_count']}\n"
-            dashboard += f"- Files Changed: {activity['files_changed']}\n"
+            dashboard += (f"- Files Changed: {activity['files_changed']} "
+                          f"(staged {activity['files_staged']}, unstaged {activity['files_unstaged']}, "
+                          f"untracked {activity['files_untracked']})\n")
             
             if activity["last_commit"]:
-                dashboard += f"- Last Commit: {activity['last_commit']['message']} ({activity['last_commit']['time']})\n"
+                last_commit = activity["last_commit"]
+                dashboard += f"- Last Commit: {last_commit['message']} ({format_relative_time(last_commit['timestamp'], now)})\n"
+                
+            if activity["last_event"]:
+                last_event = activity["last_event"]
+                dashboard += f"- Last Event: {last_event['event']} ({format_relative_time(last_event['timestamp'], now)})\n"
+                
+            churn = activity["churn"]
+            if churn and churn["last_commit"]:
+                window = churn["window"]
+                dashboard += (f"- Churn: +{churn['last_commit']['added']}/-{churn['last_commit']['deleted']} last commit, "
+                              f"+{window['added']}/-{window['deleted']} in {window['commits']} commits "
+                              f"over {self.churn.window / 3600:g}h\n")
             
         # タイムライン
         dashboard += "\n## 📅 Recent Timeline\n```\n"
         
-        # 各エージェントの最新コミットを時系列で表示
-        timeline_entries = []
-        for agent in self.agents:
-            activity = self.get_agent_activity(agent)
-            if activity["last_commit"]:
-                timeline_entries.append({
-                    "agent": agent,
-                    "message": activity["last_commit"]["message"],
-                    "time": activity["last_commit"]["time"]
-                })
-        
-        # 時系列でソート（簡易的）
-        for entry in timeline_entries[:5]:  # 最新5件
-            dashboard += f"{entry['time']:>12} | {entry['agent']:>20} | {entry['message']}\n"
+        # 全エージェントの直近コミットをコミット日時順に表示（相対時刻は表示時に算出）
+        for entry in snapshot.timeline:
+            relative_time = format_relative_time(entry["timestamp"], now)
+            dashboard += f"{relative_time:>14} | {entry['agent']:>20} | {entry['message']}\n"
             
         dashboard += "```\n"
         
@@ -220,60 +3273,381 @@ Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
             dashboard += "- Test Lead: Create new test cases\n"
             dashboard += "- Start next TDD cycle\n"
             
+        self.profiler.record("generate_dashboard", started, time.perf_counter() - started)
         return dashboard
         
-    def watch(self, interval=30):
-        """リアルタイムモニタリング"""
+    @staticmethod
+    def monitor_footer(snapshot):
+        """端末表示用のフッター（更新ごとに変わるため保存・配信するダッシュボードには含めない）"""
+        return f"\n---\n*Monitor: {snapshot.subprocess_count} subprocess calls per refresh*\n"
+        
+    def register_watches(self, watcher):
+        """ダッシュボード各セクションの入力パスを監視対象に登録"""
+        self.registry.refresh()
+        watcher.add(self.project_path / "output" / "tests", {"tests"}, recursive=True)
+        watcher.add(self.project_path / "coverage", {"tests"})
+        
+        for agent in self.agents:
+            worktree_path = self.worktree_path(agent)
+            watcher.add(worktree_path / "sync", {agent}, names={"status.md", EventJournal.FILE_NAME})
+            
+            location = GitQueryEngine.locate(worktree_path)
+            if location is None:
+                continue
+            gitdir, common_dir = location
+            watcher.add(gitdir, {agent}, names={"HEAD"})
+            watcher.add(common_dir, {agent}, names={"packed-refs"})
+            
+            # 自分のブランチのrefファイルだけを監視
+            branch = GitRepository.head_ref(gitdir)
+            if branch:
+                ref_path = common_dir / branch
+                watcher.add(ref_path.parent, {agent}, names={ref_path.name})
+                
+    def publish(self, snapshot, display=True):
+        """スナップショットを履歴に記録し、ダッシュボードを表示・保存"""
+        if self.history is not None:
+            with self.profiler.span("history"):
+                self.history.record(snapshot)
+        dashboard = self.generate_dashboard(snapshot)
+        if self.server is not None:
+            self.server.publish(self.server_name, snapshot, dashboard)
+        if self.metrics is not None:
+            self.metrics.update(self.metrics_name, snapshot)
+        with self.profiler.span("render"):
+            self._render(dashboard, display=display, footer=self.monitor_footer(snapshot))
+        
+    def _render(self, dashboard, display=True, footer=""):
+        """ダッシュボードを表示してファイルに保存（footer は表示のみ）"""
+        if display:
+            # 前回表示との差分行のみ書き換え
+            self.renderer.render(dashboard + footer)
+        
+        # ファイルにも保存
+        self.save_dashboard(dashboard)
+        
+    def save_dashboard(self, dashboard):
+        """sync/tdd-dashboard.md に保存（生成時刻・相対時刻以外に変更がなければ書き込まない）"""
+        dashboard_file = self.project_path / "sync" / "tdd-dashboard.md"
+        self.writer.write(dashboard_file, dashboard)
+        return dashboard_file
+            
+    def attach_server(self, server):
+        """HTTP配信サーバーに接続"""
+        self.server = server
+        self.server_name = server.unique_name(self.project_path)
+        
+    def attach_metrics(self, metrics):
+        """OpenMetricsエクスポーターに接続"""
+        self.metrics = metrics
+        self.metrics_name = metrics.names.assign(self.project_path)
+        
+    def watch(self, interval=30, backend="auto", debounce=0.25, display=True):
+        """リアルタイムモニタリング
+        
+        ファイル変更イベントで該当セクションのみ再計算し、
+        interval秒ごとに全体を再収集する（活動状況の経過時間判定のため）
+        """
+        watcher = create_file_watcher(backend)
         print("🔍 TDD Progress Monitor Started")
         print(f"Monitoring: {self.project_path}")
-        print(f"Update interval: {interval}s")
+        print(f"Watch backend: {type(watcher).__name__}")
+        print(f"Full refresh interval: {interval}s")
         print("Press Ctrl+C to stop\n")
         
         try:
+            snapshot = None
+            next_full_refresh = 0
             while True:
-                # ダッシュボード生成
-                dashboard = self.generate_dashboard()
-                
-                # 画面クリア（Unix/Linux/Mac）
-                os.system('clear' if os.name != 'nt' else 'cls')
-                
-                # ダッシュボード表示
-                print(dashboard)
-                
-                # ファイルにも保存
-                dashboard_file = self.project_path / "sync" / "tdd-dashboard.md"
-                dashboard_file.parent.mkdir(exist_ok=True)
-                with open(dashboard_file, 'w') as f:
-                    f.write(dashboard)
-                
-                # 待機
-                time.sleep(interval)
-                
+                now = time.monotonic()
+                if snapshot is None or now >= next_full_refresh:
+                    # 新しく作成されたworktreeやディレクトリも監視対象に加える
+                    self.register_watches(watcher)
+                    snapshot = self.collect_snapshot()
+                    next_full_refresh = now + interval
+                    self.publish(snapshot, display=display)
+                    
+                # 変更を待機
+                changed = watcher.wait(next_full_refresh - time.monotonic(), debounce=debounce)
+                if changed:
+                    snapshot = self.collect_snapshot(snapshot, changed)
+                    self.publish(snapshot, display=display)
+                    
         except KeyboardInterrupt:
             print("\n\n✅ Monitoring stopped")
+        finally:
+            watcher.close()
+            self.close()
+            
+class MonitorDaemon:
+    """複数プロジェクトを1プロセス・1スケジューラで監視するデーモン
+    
+    git(cat-file)・スレッドプール・statキャッシュを全プロジェクトで共有し、
+    各プロジェクトの更新時刻にジッターを加えて起床タイミングを分散させる
+    """
+
+    def __init__(self, projects, jitter=0.1, parallelism=4, server=None, metrics=None,
+                 **monitor_options):
+        self.jitter = jitter
+        self.subprocess_count = 0
+        self._count_lock = threading.Lock()
+        self.git = GitQueryEngine(self._spawn, monitor_options.get("probe_timeout", 10.0))
+        self.stat_cache = StatCache()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, parallelism),
+            thread_name_prefix="tdd-probe"
+        )
+        self.entries = [
+            {
+                "monitor": TDDProgressMonitor(
+                    project_path,
+                    parallelism=parallelism,
+                    git=self.git,
+                    stat_cache=self.stat_cache,
+                    executor=self.executor,
+                    **monitor_options
+                ),
+                "interval": interval
+            }
+            for project_path, interval in projects
+        ]
+        for entry in self.entries:
+            if server is not None:
+                entry["monitor"].attach_server(server)
+            if metrics is not None:
+                entry["monitor"].attach_metrics(metrics)
+        
+    def _spawn(self, cmd):
+        """共有の常駐サブプロセス起動（呼び出し回数を記録）"""
+        with self._count_lock:
+            self.subprocess_count += 1
+        return subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        
+    def _next_delay(self, interval):
+        """ジッターを加えた次回までの待ち時間"""
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+        
+    def refresh(self, entry):
+        """1プロジェクト分を収集してダッシュボードを書き出す"""
+        monitor = entry["monitor"]
+        try:
+            snapshot = monitor.collect_snapshot()
+            monitor.publish(snapshot, display=False)
+            print(f"[{snapshot.collected_at.strftime('%H:%M:%S')}] {monitor.project_path}: "
+                  f"{snapshot.phase} ({snapshot.subprocess_count} subprocess calls)")
+        except Exception as e:
+            print(f"❌ {monitor.project_path}: {e}")
             
+    def run(self):
+        """スケジューラのメインループ"""
+        print("🔍 TDD Progress Monitor Daemon Started")
+        for entry in self.entries:
+            print(f"Monitoring: {entry['monitor'].project_path} (every {entry['interval']}s)")
+        print("Press Ctrl+C to stop\n")
+        
+        # 初回も間隔内にばらして同時起床を避ける
+        now = time.monotonic()
+        schedule = [
+            (now + random.uniform(0, entry["interval"]), index)
+            for index, entry in enumerate(self.entries)
+        ]
+        heapq.heapify(schedule)
+        
+        try:
+            while schedule:
+                due, index = schedule[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                    continue
+                heapq.heappop(schedule)
+                entry = self.entries[index]
+                self.refresh(entry)
+                heapq.heappush(schedule, (time.monotonic() + self._next_delay(entry["interval"]), index))
+        except KeyboardInterrupt:
+            print("\n\n✅ Monitoring stopped")
+        finally:
+            self.close()
+            
+    def close(self):
+        """全プロジェクトと共有リソースを終了"""
+        for entry in self.entries:
+            entry["monitor"].close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.git.close()
+
+
+def expand_projects(specs, default_interval):
+    """ "PATH[=INTERVAL]" 形式（PATHはglob可）をプロジェクト一覧に展開"""
+    projects = []
+    seen = set()
+    for spec in specs:
+        pattern, _, interval = spec.partition("=")
+        interval = float(interval) if interval else default_interval
+        paths = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in paths:
+            resolved = Path(path).resolve()
+            if resolved.is_dir() and resolved not in seen:
+                seen.add(resolved)
+                projects.append((resolved, interval))
+    return projects
+
+
+def print_history_report(history):
+    """指標履歴のサマリーを表示"""
+    now = time.time()
+    print("# TDD Cycle History\n")
+    print("## ⏱️ Phase Durations")
+    for phase, start, end in history.phase_durations():
+        started = datetime.fromtimestamp(start).strftime("%Y-%m-%d %H:%M:%S")
+        duration = ((end or now) - start) / 60
+        suffix = "" if end else " (current)"
+        print(f"- {started} {phase:>10}: {duration:.1f} min{suffix}")
+        
+    print("\n## 🐢 Agent Progress")
+    for agent, progress in sorted(history.agent_last_progress().items()):
+        print(f"- {agent}: {progress['commit_count']} commits, unchanged for "
+              f"{format_relative_time(progress['since'], now).replace(' ago', '')}")
+              
 def main():
     parser = argparse.ArgumentParser(description='TDD進捗モニタリング')
-    parser.add_argument('project_path', help='プロジェクトパス')
+    parser.add_argument('project_path', nargs='+',
+                        help='プロジェクトパス（--daemon時は複数指定・glob・"PATH=間隔秒"指定可）')
     parser.add_argument('--watch', action='store_true', help='リアルタイムモニタリング')
-    parser.add_argument('--interval', type=int, default=30, help='更新間隔（秒）')
+    parser.add_argument('--daemon', action='store_true', help='複数プロジェクトを1プロセスで監視')
+    parser.add_argument('--jitter', type=float, default=0.1, help='デーモンの更新間隔に加える揺らぎ（間隔に対する割合）')
+    parser.add_argument('--interval', type=int, default=30, help='全体再収集の間隔（秒）')
+    parser.add_argument('--watch-backend', choices=['auto', 'inotify', 'poll'], default='auto',
+                        help='変更検知方式（auto: inotifyが使えなければmtimeポーリング）')
+    parser.add_argument('--debounce', type=float, default=0.25, help='連続した変更をまとめる待ち時間（秒）')
+    parser.add_argument('--parallel', type=int, default=4, help='エージェント情報の並列取得数（1で逐次実行）')
+    parser.add_argument('--probe-timeout', type=float, default=10.0, help='エージェントごとの取得タイムアウト（秒）')
+    parser.add_argument('--active-threshold', type=int, default=300,
+                        help='status.md更新からこの秒数以内ならactive')
+    parser.add_argument('--idle-threshold', type=int, default=3600,
+                        help='status.md更新からこの秒数以内ならidle（超過でinactive）')
+    parser.add_argument('--timeline', type=int, default=5, help='Recent Timelineに表示するコミット数')
+    parser.add_argument('--churn-window', type=float, default=24,
+                        help='追加・削除行数を集計する期間（時間）')
+    parser.add_argument('--serve', metavar='[HOST:]PORT',
+                        help='ダッシュボードをHTTPで配信（JSON / Markdown / HTML / SSE）。--watchなしでも継続監視する')
+    parser.add_argument('--metrics-textfile', metavar='PATH',
+                        help='node_exporter textfile collector 用の指標ファイルを更新ごとに書き出す（--serve時は /metrics も提供）')
+    parser.add_argument('--profile', nargs='?', const='breakdown', choices=['breakdown', 'cprofile', 'trace'],
+                        help='ステージ別の所要時間を終了時に表示（cprofile: pstatsも出力しエージェント取得を逐次化、'
+                             'trace: Chrome Trace JSONも出力）')
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help='cprofile / trace の出力先（既定: tdd-monitor.pstats / tdd-monitor-trace.json）')
+    parser.add_argument('--no-history', action='store_true', help='指標履歴（sync/.monitor-cache/history.sqlite3）を記録しない')
+    parser.add_argument('--history-retention-days', type=int, default=90, help='指標履歴の保持日数')
+    parser.add_argument('--history-report', action='store_true', help='指標履歴からフェーズ所要時間とエージェントの停滞状況を表示')
     
     args = parser.parse_args()
     
-    monitor = TDDProgressMonitor(args.project_path)
+    profiler = StageProfiler(enabled=args.profile is not None)
+    if args.profile == "cprofile":
+        # cProfileは呼び出したスレッドしか計測しないため、エージェント取得もメインスレッドで行う
+        args.parallel = 1
+    
+    monitor_options = {
+        "profiler": profiler,
+        "probe_timeout": args.probe_timeout,
+        "history": not args.no_history or args.history_report,
+        "history_retention_days": args.history_retention_days,
+        "timeline_size": args.timeline,
+        "active_threshold": args.active_threshold,
+        "idle_threshold": args.idle_threshold,
+        "churn_window": args.churn_window * 3600
+    }
+    
+    # 配信名と project ラベルを同じ規則・同じ値にする
+    names = ProjectNames()
+    metrics = None
+    if args.serve or args.metrics_textfile:
+        metrics = MetricsExporter(args.metrics_textfile, names)
+        
+    server = None
+    if args.serve:
+        host, _, port = args.serve.rpartition(":")
+        server = DashboardServer(host or "127.0.0.1", int(port), names)
+        server.metrics = metrics
+        server.start()
+        print(f"🌐 Dashboard server: {server.address}")
+        
+    profile = cProfile.Profile() if args.profile == "cprofile" else None
+    try:
+        if profile is not None:
+            profile.enable()
+        run_monitor(parser, args, monitor_options, server, metrics)
+    finally:
+        if profile is not None:
+            profile.disable()
+        if server is not None:
+            server.close()
+        if args.profile is not None:
+            print_profile_report(args, profiler, profile)
+            
+            
+def print_profile_report(args, profiler, profile=None):
+    """--profile の計測結果を表示・出力"""
+    print("\n⏱️ Stage Breakdown")
+    print(profiler.breakdown())
+    if args.profile == "cprofile":
+        output = args.profile_output or "tdd-monitor.pstats"
+        profile.dump_stats(output)
+        print(f"\n📈 Top functions by cumulative time (saved to {output})")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(20)
+    elif args.profile == "trace":
+        output = args.profile_output or "tdd-monitor-trace.json"
+        profiler.write_chrome_trace(output)
+        print(f"\n📈 Chrome trace saved to: {output} (chrome://tracing / ui.perfetto.dev)")
+            
+            
+def run_monitor(parser, args, monitor_options, server, metrics=None):
+    """コマンドライン引数に応じて監視を実行"""
+    if args.daemon:
+        projects = expand_projects(args.project_path, args.interval)
+        if not projects:
+            parser.error("監視対象のプロジェクトが見つかりません")
+        daemon = MonitorDaemon(projects, jitter=args.jitter, parallelism=args.parallel,
+                               server=server, metrics=metrics, **monitor_options)
+        daemon.run()
+        return
+    if len(args.project_path) > 1:
+        parser.error("複数プロジェクトの監視には --daemon を指定してください")
+    args.project_path = args.project_path[0]
+    
+    monitor = TDDProgressMonitor(args.project_path, parallelism=args.parallel, **monitor_options)
+    if server is not None:
+        monitor.attach_server(server)
+    if metrics is not None:
+        monitor.attach_metrics(metrics)
     
-    if args.watch:
-        monitor.watch(args.interval)
+    if args.history_report:
+        print_history_report(monitor.history)
+        monitor.close()
+    elif args.watch or server is not None:
+        # --serve のみ指定時は端末表示せずに監視を継続
+        monitor.watch(args.interval, backend=args.watch_backend, debounce=args.debounce,
+                      display=args.watch)
     else:
         # 一度だけ実行
-        dashboard = monitor.generate_dashboard()
-        print(dashboard)
+        snapshot = monitor.collect_snapshot()
+        if monitor.history is not None:
+            monitor.history.record(snapshot)
+        if monitor.metrics is not None:
+            monitor.metrics.update(monitor.metrics_name, snapshot)
+        dashboard = monitor.generate_dashboard(snapshot)
+        monitor.close()
+        print(dashboard + monitor.monitor_footer(snapshot))
         
         # ファイルに保存
-        dashboard_file = Path(args.project_path) / "sync" / "tdd-dashboard.md"
-        dashboard_file.parent.mkdir(exist_ok=True)
-        with open(dashboard_file, 'w') as f:
-            f.write(dashboard)
+        dashboard_file = monitor.save_dashboard(dashboard)
         print(f"\n✅ Dashboard saved to: {dashboard_file}")
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+TDDイベントをworktreeの sync/events.jsonl に追記
+エージェントやgitフックから呼び出し、monitor-tdd-progress.py がフェーズ判定に使う
+
+1イベント1行のJSON（ts・agent・event・detail）を O_APPEND で1回の書き込みとして追記するため、
+複数のプロセスが同時に書いても行が混ざらない
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+# monitor-tdd-progress.py の EventJournal.PHASES と対応
+EVENTS = [
+    "test-written",
+    "tests-red",
+    "implement-started",
+    "tests-green",
+    "refactor-started",
+    "review-started",
+    "integrate-started",
+    "cycle-done"
+]
+
+
+def detect_agent(worktree):
+    """agent/<名前> ブランチのworktreeならエージェント名（判別できなければNone）"""
+    dot_git = Path(worktree) / ".git"
+    try:
+        if dot_git.is_file():
+            gitdir = Path(worktree) / dot_git.read_text().strip()[len("gitdir: "):]
+        else:
+            gitdir = dot_git
+        head = (gitdir / "HEAD").read_text().strip()
+    except OSError:
+        return None
+    prefix = "ref: refs/heads/agent/"
+    return head[len(prefix):] if head.startswith(prefix) else None
+
+
+def record_event(worktree, event, agent=None, detail=None):
+    """イベントを1行追記し、書き込んだレコードを返す"""
+    record = {"ts": round(time.time(), 3), "agent": agent, "event": event}
+    if detail:
+        record["detail"] = detail
+    journal = Path(worktree) / "sync" / "events.jsonl"
+    journal.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(journal, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TDDイベントをsync/events.jsonlに記録')
+    parser.add_argument('event', choices=EVENTS, help='イベント名')
+    parser.add_argument('--agent', help='エージェント名（既定: agent/<名前> ブランチから判別）')
+    parser.add_argument('--detail', help='補足（テスト名・コミットなど）')
+    parser.add_argument('--worktree', default='.', help='記録先のworktree（既定: カレントディレクトリ）')
+
+    args = parser.parse_args()
+
+    worktree = Path(args.worktree)
+    if not worktree.is_dir():
+        print(f"❌ エラー: worktreeが見つかりません: {worktree}", file=sys.stderr)
+        return 1
+
+    record = record_event(worktree, args.event, args.agent or detect_agent(worktree), args.detail)
+    print(f"📝 {record['event']} ({record['agent'] or 'unknown'}) を記録しました")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -77,6 +77,13 @@ coverage/
 *.log
 logs/
 
+# TDD monitor cache
+sync/.monitor-cache/
+
+# CLAUDE.md generation (rendered output and skip manifests)
+.claude-md/
+.claude-md-manifest.json
+
 # OS
 .DS_Store
 Thumbs.db
@@ -154,17 +161,23 @@ echo "🤖 TDDエージェント設定を作成中..."
 # 各エージェント用のブランチとワークツリー作成
 AGENTS=("test-lead" "backend-developer" "frontend-developer" "review-engineer" "integration-engineer")
 
+# CLAUDE.mdを全エージェント分まとめて生成（Python起動・設定読み込みは1回）
+# 生成先は残しておき、入力が変わっていないエージェントは再実行時に描画しない
+CLAUDE_MD_DIR="$(pwd)/.claude-md"
+python3 ../../scripts/generate-tdd-claude-config.py \
+    --team tdd \
+    --project-name "$PROJECT_NAME" \
+    --tech-stack "$TECH_STACK" \
+    --output-dir "$CLAUDE_MD_DIR" \
+    --worktree-pattern "{agent}"
+
 for AGENT in "${AGENTS[@]}"; do
     echo "  📍 $AGENT 用のブランチを作成..."
     git checkout -b "agent/$AGENT"
     
-    # CLAUDE.md生成
-    echo "  📝 $AGENT のCLAUDE.md生成..."
-    python3 ../../scripts/generate-tdd-claude-config.py \
-        --agent "$AGENT" \
-        --project-name "$PROJECT_NAME" \
-        --tech-stack "$TECH_STACK" \
-        --output-dir "."
+    # CLAUDE.md配置
+    echo "  📝 $AGENT のCLAUDE.md配置..."
+    cp "$CLAUDE_MD_DIR/$AGENT/CLAUDE.md" CLAUDE.md
     
     git add CLAUDE.md
     git commit -m "feat: $AGENT エージェント設定を追加"
@@ -0,0 +1,90 @@
+"""monitor-tdd-progress.py の TestResultIngestor のテスト"""
+
+import os
+import json
+import time
+import tempfile
+import unittest
+import importlib.util
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "monitor-tdd-progress.py"
+spec = importlib.util.spec_from_file_location("monitor_tdd_progress", SCRIPT)
+monitor = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(monitor)
+
+JUNIT_XML = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="3">
+<testcase classname="t" name="a"/>
+<testcase classname="t" name="b"/>
+<testcase classname="t" name="c"><failure message="boom"/></testcase>
+</testsuite></testsuites>
+"""
+
+PYTEST_JSON = {
+    "created": 0,
+    "duration": 0.1,
+    "exitcode": 1,
+    "root": "/project",
+    "environment": {},
+    "summary": {"passed": 2, "failed": 1, "total": 3, "collected": 3},
+    "tests": []
+}
+
+
+class TestResultIngestorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.ingestor = monitor.TestResultIngestor(self.root / "cache" / "test-results.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, relative, content, age=0):
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+        if age:
+            mtime = time.time() - age
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def test_same_run_in_junit_and_json_is_counted_once(self):
+        reports = [
+            self.write("reports/junit.xml", JUNIT_XML),
+            self.write("reports/report.json", PYTEST_JSON)
+        ]
+        totals = self.ingestor.ingest(reports)
+        self.assertEqual((totals["passed"], totals["failed"], totals["reports"]), (2, 1, 1))
+
+    def test_reports_older_than_latest_run_are_ignored(self):
+        reports = [
+            self.write("reports/old-junit.xml", JUNIT_XML, age=3600),
+            self.write("reports/junit.xml", JUNIT_XML)
+        ]
+        totals = self.ingestor.ingest(reports)
+        self.assertEqual((totals["passed"], totals["failed"], totals["reports"]), (2, 1, 1))
+
+    def test_reports_in_separate_directories_are_summed(self):
+        reports = [
+            self.write("backend/junit.xml", JUNIT_XML),
+            self.write("frontend/report.json", PYTEST_JSON, age=3600)
+        ]
+        totals = self.ingestor.ingest(reports)
+        self.assertEqual((totals["passed"], totals["failed"], totals["reports"]), (4, 2, 2))
+
+    def test_cached_results_give_the_same_totals(self):
+        reports = [
+            self.write("reports/junit.xml", JUNIT_XML),
+            self.write("reports/report.json", PYTEST_JSON)
+        ]
+        first = self.ingestor.ingest(reports)
+        reloaded = monitor.TestResultIngestor(self.ingestor.cache_file)
+        self.assertEqual(reloaded.ingest(reports), first)
+        self.assertEqual(reloaded.parsed_reports, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()